@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque, namedtuple
+
+import homework
+from error_digest import ErrorAggregator
+
+ACCOUNTS_SOURCE = os.getenv('ACCOUNTS_SOURCE', '')
+HISTORY_SIZE = int(os.getenv('HISTORY_SIZE', 20))
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+ACCOUNTS_QUERY = 'SELECT name, practicum_token, chat_id FROM accounts'
+
+NO_ACCOUNTS_ERROR = 'Не найдено ни одного аккаунта в {source}'
+ACCOUNT_FIELD_ERROR = 'В описании аккаунта {account} нет поля {field}'
+DUPLICATE_ACCOUNT_ERROR = 'Аккаунт {name} описан несколько раз'
+ACCOUNTS_LOADED = 'Загружено аккаунтов: {count} из {source}'
+
+Account = namedtuple('Account', ('name', 'practicum_token', 'chat_id'))
+
+logger = logging.getLogger(__name__)
+
+
+class AccountState:
+    """Состояние опроса одного аккаунта.
+
+    homeworks - последние полученные записи работ по ключу, history -
+    последние HISTORY_SIZE отправленных изменений (время, работа,
+    статус); оба нужны командам бота и не сохраняются между запусками.
+    """
+
+    __slots__ = (
+        'account', 'timestamp', 'errors', 'statuses', 'last_change',
+        'next_poll', 'failures', 'homeworks', 'history', 'fingerprint'
+    )
+
+    def __init__(self, account, timestamp=0, last_error=''):
+        self.account = account
+        self.timestamp = timestamp
+        self.errors = ErrorAggregator(
+            homework.MAIN_EXCEPTION_ERROR, last_message=last_error
+        )
+        self.statuses = {}
+        self.last_change = time.time()
+        self.next_poll = 0
+        self.failures = 0
+        self.homeworks = {}
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.fingerprint = homework.ResponseFingerprint()
+
+    @property
+    def last_error(self):
+        """Последнее отправленное сообщение об ошибке, '' - сбоя нет."""
+        return self.errors.last_message
+
+    @last_error.setter
+    def last_error(self, message):
+        self.errors.last_message = message
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API с токеном аккаунта."""
+        return {'Authorization': f'OAuth {self.account.practicum_token}'}
+
+
+class AccountTable:
+    """Таблица состояний всех аккаунтов, опрашиваемых процессом."""
+
+    def __init__(self, accounts=()):
+        self.states = {}
+        for account in accounts:
+            self.add(account)
+
+    def add(self, account):
+        """Добавляем аккаунт в таблицу."""
+        if account.name in self.states:
+            raise ValueError(DUPLICATE_ACCOUNT_ERROR.format(name=account.name))
+        self.states[account.name] = AccountState(account)
+        return self.states[account.name]
+
+    def sync(self, accounts):
+        """Приводим таблицу к новому списку аккаунтов.
+
+        Состояние оставшихся аккаунтов сохраняется, у них обновляются
+        токен и чат. Возвращаем состояния добавленных и удалённых
+        аккаунтов.
+        """
+        accounts = {account.name: account for account in accounts}
+        removed = [self.states.pop(name) for name in list(self.states)
+                   if name not in accounts]
+        added = []
+        for name, account in accounts.items():
+            if name in self.states:
+                self.states[name].account = account
+            else:
+                added.append(self.add(account))
+        return added, removed
+
+    def __getitem__(self, name):
+        return self.states[name]
+
+    def __iter__(self):
+        return iter(self.states.values())
+
+    def __len__(self):
+        return len(self.states)
+
+
+def account_from_dict(data):
+    """Создаём аккаунт из словаря конфигурации."""
+    for field in Account._fields:
+        if field not in data:
+            raise ValueError(ACCOUNT_FIELD_ERROR.format(
+                account=data, field=field
+            ))
+    return Account(
+        str(data['name']), data['practicum_token'], str(data['chat_id'])
+    )
+
+
+def load_json_accounts(path):
+    """Читаем аккаунты из JSON-файла со списком словарей."""
+    with open(path, encoding='utf-8') as file:
+        return [account_from_dict(data) for data in json.load(file)]
+
+
+def load_sqlite_accounts(path):
+    """Читаем аккаунты из таблицы accounts базы SQLite."""
+    connection = sqlite3.connect(path)
+    try:
+        return [
+            Account(str(name), token, str(chat_id))
+            for name, token, chat_id in connection.execute(ACCOUNTS_QUERY)
+        ]
+    finally:
+        connection.close()
+
+
+def load_env_accounts():
+    """Единственный аккаунт из переменных окружения."""
+    homework.check_tokens()
+    return [Account(
+        homework.DEFAULT_ACCOUNT, homework.PRACTICUM_TOKEN,
+        homework.TELEGRAM_CHAT_ID
+    )]
+
+
+def load_accounts(source=None):
+    """Загружаем аккаунты из файла, базы SQLite или окружения."""
+    source = ACCOUNTS_SOURCE if source is None else source
+    if not source:
+        accounts = load_env_accounts()
+    elif source.endswith(SQLITE_SUFFIXES):
+        accounts = load_sqlite_accounts(source)
+    else:
+        accounts = load_json_accounts(source)
+    if not accounts:
+        raise ValueError(NO_ACCOUNTS_ERROR.format(source=source))
+    logger.info(ACCOUNTS_LOADED.format(
+        count=len(accounts), source=source or 'env'
+    ))
+    return accounts
@@ -0,0 +1,209 @@
+"""Бенчмарки конвейера опрос - проверка - отправка.
+
+Запуск и сохранение результатов:
+    python benchmarks/bench_pipeline.py --output results.json
+Сравнение с базовой линией (код возврата 1 при регрессии):
+    python benchmarks/bench_pipeline.py --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('STATE_BACKEND', 'memory')
+
+import homework  # noqa: E402
+import stub_servers  # noqa: E402
+from accounts import Account, AccountTable  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from http_pool import create_session  # noqa: E402
+from outbox import TokenBucket  # noqa: E402
+from telegram_api import TelegramClient  # noqa: E402
+
+SIZES = (10, 1000, 100000)
+ACCOUNTS = 200
+REPEAT = 5
+ROUNDS = 3
+THRESHOLD = 0.3
+LOWER = 'lower'
+HIGHER = 'higher'
+
+REGRESSION = ('РЕГРЕССИЯ {name}: {value:.6g} против {baseline:.6g} '
+              '(допустимо {threshold:.0%})')
+RESULT = '{name:<40} {value:>14.6g} {unit}'
+
+
+def make_homeworks(size):
+    """Ответ API с size работами."""
+    statuses = tuple(homework.HOMEWORK_VERDICTS)
+    return {
+        'homeworks': [{
+            'id': number,
+            'homework_name': f'hw{number}',
+            'status': statuses[number % len(statuses)],
+            'date_updated': '2020-02-13T14:40:57Z'
+        } for number in range(size)],
+        'current_date': 1000198000
+    }
+
+
+def best_time(func, repeat=REPEAT):
+    """Лучшее среднее время одного вызова func из repeat серий."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def micro_benchmarks(sizes=SIZES):
+    """Проверка и разбор ответов разного размера."""
+    results = {}
+    for size in sizes:
+        response = make_homeworks(size)
+        results[f'check_response[{size}]'] = best_time(
+            lambda: homework.check_response(response)
+        )
+        records = homework.check_response(response)
+        results[f'collect_updates[{size}]'] = best_time(
+            lambda: homework.collect_updates(records, {})
+        )
+    return {
+        name: {'value': value, 'unit': 's', 'better': LOWER}
+        for name, value in results.items()
+    }
+
+
+class RecordingTelegramClient(TelegramClient):
+    """Клиент, запоминающий момент подтверждения каждой отправки."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent_at = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Отправка с записью времени подтверждения."""
+        result = super().send_message(chat_id, text, **kwargs)
+        self.sent_at.append(time.monotonic())
+        return result
+
+
+def percentile(values, share):
+    """Перцентиль share отсортированного списка."""
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def end_to_end(accounts=ACCOUNTS, rounds=ROUNDS):
+    """Опрос accounts аккаунтов через локальные заглушки.
+
+    Берём лучший из rounds циклов опроса и отправки.
+    """
+    practicum = stub_servers.start_stub(
+        stub_servers.PracticumStubHandler,
+        stub_servers.StubConfig(homeworks=3, seed=1)
+    )
+    telegram_stub = stub_servers.start_stub(
+        stub_servers.TelegramStubHandler, stub_servers.StubConfig(seed=1)
+    )
+    homework.ENDPOINT = 'http://127.0.0.1:{}{}'.format(
+        practicum.server_address[1], stub_servers.PRACTICUM_PATH
+    )
+    session = create_session()
+    bot = RecordingTelegramClient(
+        '1234:bench', session,
+        base_url=f'http://127.0.0.1:{telegram_stub.server_address[1]}/bot'
+    )
+    table = AccountTable(
+        Account(f'student{i}', f'token{i}', str(i)) for i in range(accounts)
+    )
+    engine = PollingEngine(bot, table, session, concurrency=50)
+    engine.outbox.global_bucket = TokenBucket(rate=1e6, capacity=accounts)
+
+    async def cycle():
+        bot.sent_at.clear()
+        for state in table:
+            state.statuses.clear()
+        started = time.monotonic()
+        await engine.poll_all()
+        polled = time.monotonic()
+        await engine.outbox.drain()
+        await asyncio.sleep(1 / engine.outbox.chat_rate)
+        return (accounts / (polled - started),
+                sorted(sent - started for sent in bot.sent_at))
+
+    async def best_cycle():
+        return max([await cycle() for _ in range(rounds)])
+
+    try:
+        throughput, latencies = asyncio.run(best_cycle())
+    finally:
+        engine.close()
+        practicum.shutdown()
+        telegram_stub.shutdown()
+    return {
+        'accounts_per_second': {
+            'value': throughput, 'unit': '1/s', 'better': HIGHER
+        },
+        'notification_latency_p50': {
+            'value': percentile(latencies, 0.5), 'unit': 's', 'better': LOWER
+        },
+        'notification_latency_p99': {
+            'value': percentile(latencies, 0.99), 'unit': 's',
+            'better': LOWER
+        },
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Список регрессий относительно базовой линии."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        value, base = result['value'], baseline[name]['value']
+        if result['better'] == LOWER:
+            regressed = value > base * (1 + threshold)
+        else:
+            regressed = value < base * (1 - threshold)
+        if regressed:
+            regressions.append(REGRESSION.format(
+                name=name, value=value, baseline=base, threshold=threshold
+            ))
+    return regressions
+
+
+def parse_args(args=None):
+    """Аргументы командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='куда сохранить результаты JSON')
+    parser.add_argument('--compare', help='файл базовой линии JSON')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--accounts', type=int, default=ACCOUNTS)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Запуск бенчмарков, сохранение и сравнение результатов."""
+    args = parse_args(args)
+    results = micro_benchmarks(args.sizes)
+    results.update(end_to_end(args.accounts))
+    for name, result in results.items():
+        print(RESULT.format(name=name, **result))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
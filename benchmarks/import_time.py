@@ -0,0 +1,78 @@
+"""Отчёт о времени импорта модулей при запуске бота.
+
+Запуск:
+    python benchmarks/import_time.py homework --top 15
+Модуль импортируется в отдельном процессе с python -X importtime, отчёт
+показывает самые долгие импорты: собственное и накопленное время.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOP = 15
+
+REPORT_HEADER = '{:<40} {:>12} {:>12}'.format(
+    'модуль', 'своё, мс', 'всего, мс'
+)
+REPORT_LINE = '{name:<40} {self_ms:>12.1f} {cumulative_ms:>12.1f}'
+REPORT_TOTAL = 'Импорт {module}: {total_ms:.1f} мс'
+
+
+def measure(module):
+    """Вывод python -X importtime для импорта module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return result.stderr
+
+
+def parse_importtime(output):
+    """Список (модуль, своё мкс, всего мкс) из вывода -X importtime."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(module, top=TOP):
+    """Текстовый отчёт о самых долгих импортах module."""
+    rows = parse_importtime(measure(module))
+    total = next(
+        (cumulative for name, _, cumulative in rows if name == module), 0
+    )
+    lines = [REPORT_TOTAL.format(module=module, total_ms=total / 1000),
+             REPORT_HEADER]
+    for name, self_us, cumulative_us in sorted(
+        rows, key=lambda row: row[2], reverse=True
+    )[:top]:
+        lines.append(REPORT_LINE.format(
+            name=name, self_ms=self_us / 1000,
+            cumulative_ms=cumulative_us / 1000
+        ))
+    return '\n'.join(lines)
+
+
+def parse_args(args=None):
+    """Аргументы командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=['homework'])
+    parser.add_argument('--top', type=int, default=TOP)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Печатаем отчёт для каждого модуля."""
+    args = parse_args(args)
+    print('\n\n'.join(report(module, args.top) for module in args.modules))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import time
+
+import telegram
+
+import homework
+from resilience import backoff_delay
+
+TELEGRAM_COMMANDS = os.getenv('TELEGRAM_COMMANDS', 'false').lower() == 'true'
+COMMANDS_POLL_TIMEOUT = int(os.getenv('COMMANDS_POLL_TIMEOUT', 30))
+REFRESH_PERIOD = float(os.getenv('REFRESH_PERIOD', 300))
+HISTORY_TIME_FORMAT = '%d.%m %H:%M'
+
+STATUS_LINE = '{homework_name}: {verdict}'
+STATUS_EMPTY = 'Статусов работ пока нет'
+HISTORY_LINE = '{time} {homework_name}: {verdict}'
+HISTORY_EMPTY = 'Изменений статусов пока не было'
+REFRESH_STARTED = 'Проверяю статусы работ'
+REFRESH_TOO_OFTEN = ('Обновлять статусы можно не чаще раза в {period:.0f} с, '
+                     'попробуйте через {wait:.0f} с')
+COMMANDS_HELP = ('/status - текущие статусы работ\n'
+                 '/history - последние изменения статусов\n'
+                 '/refresh - проверить статусы сейчас')
+ACCOUNT_HEADER = '{account}:\n{text}'
+COMMANDS_ERROR = 'Не удалось получить команды бота: {error}'
+
+logger = logging.getLogger(__name__)
+
+
+def verdict(status):
+    """Текст вердикта, для неизвестного статуса - сам статус."""
+    return homework.HOMEWORK_VERDICTS.get(status, status)
+
+
+class CommandHandler:
+    """Команды бота в чатах аккаунтов движка.
+
+    /status и /history отвечают из последних результатов опроса в
+    памяти и не обращаются к API Практикума. /refresh не чаще раза в
+    refresh_period секунд назначает внеочередной опрос аккаунта.
+    Сообщения получаем long polling через getUpdates.
+    """
+
+    def __init__(self, engine, client, refresh_period=REFRESH_PERIOD,
+                 poll_timeout=COMMANDS_POLL_TIMEOUT, clock=time.monotonic):
+        self.engine = engine
+        self.client = client
+        self.refresh_period = refresh_period
+        self.poll_timeout = poll_timeout
+        self.clock = clock
+        self.offset = None
+        self.refreshed = {}
+        self.failures = 0
+        self.commands = {
+            '/status': self.status,
+            '/history': self.history,
+            '/refresh': self.refresh,
+        }
+
+    def status(self, state):
+        """Последние известные статусы работ аккаунта."""
+        lines = []
+        for key, (status, _) in list(state.statuses.items()):
+            record = state.homeworks.get(key)
+            lines.append(STATUS_LINE.format(
+                homework_name=key if record is None else record.homework_name,
+                verdict=verdict(status)
+            ))
+        return '\n'.join(lines) or STATUS_EMPTY
+
+    def history(self, state):
+        """Последние отправленные изменения статусов."""
+        return '\n'.join(
+            HISTORY_LINE.format(
+                time=time.strftime(HISTORY_TIME_FORMAT, time.localtime(when)),
+                homework_name=homework_name, verdict=verdict(status)
+            )
+            for when, homework_name, status in list(state.history)
+        ) or HISTORY_EMPTY
+
+    def refresh(self, state):
+        """Внеочередной опрос аккаунта с ограничением частоты."""
+        now = self.clock()
+        name = state.account.name
+        last = self.refreshed.get(name)
+        if last is not None and now - last < self.refresh_period:
+            return REFRESH_TOO_OFTEN.format(
+                period=self.refresh_period,
+                wait=self.refresh_period - (now - last)
+            )
+        self.refreshed[name] = now
+        self.engine.request_poll(state)
+        return REFRESH_STARTED
+
+    def states_by_chat(self):
+        """Аккаунты движка по чатам."""
+        chats = {}
+        for state in self.engine.table:
+            chats.setdefault(str(state.account.chat_id), []).append(state)
+        return chats
+
+    def handle(self, update, chats):
+        """Отвечаем на одно сообщение боту."""
+        message = update.get('message') or {}
+        text = message.get('text') or ''
+        states = chats.get(str((message.get('chat') or {}).get('id')))
+        if not states or not text.startswith('/'):
+            return
+        command = self.commands.get(text.split()[0].split('@')[0])
+        for state in states:
+            answer = COMMANDS_HELP if command is None else command(state)
+            if len(states) > 1:
+                answer = ACCOUNT_HEADER.format(
+                    account=state.account.name, text=answer
+                )
+            self.engine.send_message(state, answer)
+
+    async def poll_updates(self):
+        """Получаем и обрабатываем очередную пачку сообщений."""
+        updates = await self.engine.run_blocking(
+            self.client.get_updates, self.offset, self.poll_timeout
+        )
+        chats = self.states_by_chat()
+        for update in updates:
+            self.offset = update['update_id'] + 1
+            self.handle(update, chats)
+
+    async def run(self):
+        """Бесконечно получаем команды; при ошибках - с паузой."""
+        while True:
+            try:
+                await self.poll_updates()
+            except telegram.TelegramError as error:
+                logger.warning(COMMANDS_ERROR.format(error=error))
+                self.failures += 1
+                await asyncio.sleep(
+                    backoff_delay(self.failures - 1, base=1, cap=60)
+                )
+            else:
+                self.failures = 0
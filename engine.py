@@ -0,0 +1,514 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import homework
+import streaming
+from accounts import AccountTable, load_accounts
+from commands import TELEGRAM_COMMANDS, CommandHandler
+from hedging import HEDGE_REQUESTS, Hedger
+from history import open_history
+from http_pool import create_session, log_pool_stats
+from lease import LEASE_RETRY, LeaseKeeper, open_lease
+from lifecycle import RELOAD_SIGNAL, handled_signals
+from log_config import LazyMessage, setup_logging
+from metrics import (ERRORS, METRICS_PORT, NOTIFICATIONS, REGISTRY,
+                     SAVED_CPU_SECONDS, SCHEDULER_LAG, STAGE_SECONDS,
+                     UNCHANGED_RESPONSES, Gauge, start_metrics_server)
+from outbox import Outbox
+from resilience import (CircuitBreaker, backoff_delay, is_endpoint_failure,
+                        parse_retry_after)
+from scheduler import (FIRST_POLL_SPREAD, PollingPolicy, PollQueue,
+                       first_poll_offset, next_due)
+from storage import MemoryStateStore, open_state_store
+from telegram_api import TelegramClient
+
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 100))
+POLL_DEADLINE = float(os.getenv('POLL_DEADLINE', 60))
+DRAIN_TIMEOUT = float(os.getenv('DRAIN_TIMEOUT', 30))
+ENGINE_LEASE_NAME = os.getenv('ENGINE_LEASE_NAME', 'engine')
+SKIP_UNCHANGED = os.getenv('SKIP_UNCHANGED', 'true').lower() == 'true'
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'false').lower() == 'true'
+
+ENGINE_STARTED = ('Движок опроса запущен, аккаунтов: {accounts}, '
+                  'одновременных запросов: {concurrency}')
+POLL_DEADLINE_ERROR = 'Ответ API не получен за {deadline} с'
+ENGINE_STOPPED = 'Движок опроса остановлен, в очереди отправки: {outbox}'
+ACCOUNTS_RELOADED = 'Аккаунты перечитаны, аккаунтов: {accounts}'
+
+logger = logging.getLogger(__name__)
+
+
+def render_cache_stats():
+    """Попадания и промахи кэша текстов сообщений о статусах."""
+    info = homework.format_status.cache_info()
+    return {('hit',): info.hits, ('miss',): info.misses,
+            ('size',): info.currsize}
+
+
+class PollingEngine:
+    """Асинхронный опрос API и отправка сообщений в Телеграм.
+
+    Блокирующие вызовы requests и telegram выполняются в пуле потоков,
+    поэтому в одном процессе одновременно идут сотни запросов и отправок.
+    Проверка ответа и разбор статуса остаются чистыми функциями homework,
+    а сообщения уходят через очередь Outbox: опрос не ждёт отправки.
+    """
+
+    def __init__(self, bot, table, session=None, store=None, policy=None,
+                 hedger=None, concurrency=MAX_CONCURRENCY,
+                 deadline=POLL_DEADLINE, stream=STREAM_RESPONSES,
+                 drain_timeout=DRAIN_TIMEOUT,
+                 first_poll_spread=FIRST_POLL_SPREAD,
+                 account_loader=load_accounts, lease=None, history=None,
+                 skip_unchanged=SKIP_UNCHANGED):
+        self.bot = bot
+        self.table = table
+        self.session = session
+        self.policy = PollingPolicy() if policy is None else policy
+        self.breaker = CircuitBreaker(homework.ENDPOINT)
+        self.hedger = hedger
+        self.deadline = deadline
+        self.stream = stream
+        self.drain_timeout = drain_timeout
+        self.wakeup = None
+        self.stopping = False
+        self.store = MemoryStateStore() if store is None else store
+        self.first_poll_spread = first_poll_spread
+        self.account_loader = account_loader
+        self.lease = lease
+        self.leading = False
+        self.history = history
+        self.skip_unchanged = skip_unchanged
+        self.queue = PollQueue()
+        for state in table:
+            self.load_state(state)
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.outbox = Outbox(bot, self.run_blocking)
+        REGISTRY.register(Gauge(
+            'homework_outbox_depth', 'Сообщений в очереди отправки',
+            collect=lambda: {(): len(self.outbox)}
+        ))
+        REGISTRY.register(Gauge(
+            'homework_scheduled_polls', 'Опросов в расписании',
+            collect=lambda: {(): len(self.queue)}
+        ))
+        REGISTRY.register(Gauge(
+            'homework_watermark_age_seconds',
+            'Сколько секунд назад получена метка current_date аккаунта',
+            ('account',), collect=self.watermark_ages
+        ))
+        REGISTRY.register(Gauge(
+            'homework_render_cache', 'Обращения к кэшу текстов сообщений',
+            ('result',), collect=render_cache_stats
+        ))
+
+    def load_state(self, state):
+        """Восстанавливаем состояние аккаунта и назначаем первый опрос.
+
+        Первые опросы аккаунтов разнесены на first_poll_spread секунд.
+        """
+        state.timestamp, state.statuses, state.last_error = (
+            self.store.load(state.account.name)
+        )
+        self.set_next_poll(state, time.monotonic() + first_poll_offset(
+            state.account.name, self.first_poll_spread
+        ))
+
+    def set_next_poll(self, state, when):
+        """Назначаем опрос аккаунта на время when по time.monotonic."""
+        state.next_poll = when
+        self.queue.schedule(state, when)
+
+    def take_due(self):
+        """Аккаунты, опрос которых наступил; опоздание идёт в метрику."""
+        states = []
+        for state, lag in self.queue.pop_due():
+            SCHEDULER_LAG.observe(lag)
+            states.append(state)
+        return states
+
+    def watermark_ages(self):
+        """Возраст метки current_date каждого аккаунта."""
+        now = time.time()
+        return {
+            (state.account.name,): now - state.timestamp
+            for state in self.table
+        }
+
+    def render_status(self, record):
+        """Текст сообщения о статусе с замером длительности."""
+        with STAGE_SECONDS.time('parse_status'):
+            return homework.render_status(record)
+
+    async def run_blocking(self, func, *args):
+        """Выполняем блокирующий вызов в пуле потоков."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def get_api_answer(self, state):
+        """Асинхронное получение данных с API YP для аккаунта.
+
+        Весь опрос, включая дублирующий запрос, ограничен deadline секунд.
+        В потоковом режиме ждём только заголовков ответа, а тело читается
+        при разборе. С skip_unchanged вместо ответа, совпавшего с последним
+        обработанным, получаем None.
+        """
+        if self.stream:
+            get = streaming.request_api_stream
+        elif self.skip_unchanged:
+            get = partial(
+                homework.request_api_changes, fingerprint=state.fingerprint
+            )
+        else:
+            get = homework.request_api_answer
+        request = partial(
+            self.run_blocking, get, state.headers, state.timestamp,
+            self.session
+        )
+        if self.hedger is not None:
+            request = partial(self.hedger.call, request)
+        try:
+            with STAGE_SECONDS.time('get_api_answer'):
+                return await asyncio.wait_for(request(), self.deadline)
+        except asyncio.TimeoutError:
+            raise ConnectionError(
+                POLL_DEADLINE_ERROR.format(deadline=self.deadline)
+            )
+
+    def send_message(self, state, message, loop=None):
+        """Ставим сообщение в очередь отправки в чат аккаунта.
+
+        Из пула потоков передаём loop: очередь меняется только в цикле
+        событий.
+        """
+        if loop is None:
+            self.outbox.put(state.account.chat_id, message)
+        else:
+            loop.call_soon_threadsafe(
+                self.outbox.put, state.account.chat_id, message
+            )
+        return True
+
+    @staticmethod
+    def remember(state, homeworks):
+        """Запоминаем записи работ для команд бота по мере проверки."""
+        for record in homeworks:
+            state.homeworks[homework.homework_key(record)] = record
+            yield record
+
+    def send_updates(self, state, homeworks, loop=None):
+        """Ставим в очередь сообщения обо всех изменившихся работах."""
+        sent = True
+        for key, entry, message in homework.iter_updates(
+            self.remember(state, homeworks), state.statuses,
+            self.render_status
+        ):
+            NOTIFICATIONS.inc()
+            if self.send_message(state, message, loop):
+                state.statuses[key] = entry
+                state.last_change = time.time()
+                state.history.append((
+                    state.last_change,
+                    state.homeworks[key].homework_name, entry[0]
+                ))
+                if self.history is not None:
+                    self.history.append(
+                        state.account.name, key, *entry, state.last_change
+                    )
+            else:
+                sent = False
+        return sent
+
+    def send_stream_updates(self, state, stream, loop):
+        """Проверяем работы по мере чтения ответа и сразу ставим сообщения.
+
+        Выполняется в пуле потоков. True - в ответе были работы и все
+        сообщения поставлены в очередь.
+        """
+        with STAGE_SECONDS.time('check_response'):
+            sent = self.send_updates(
+                state, streaming.check_stream(stream), loop
+            )
+        return sent and stream.count > 0
+
+    async def send_response_updates(self, state, response):
+        """Проверяем ответ и ставим в очередь сообщения об изменениях."""
+        if self.stream:
+            return await self.run_blocking(
+                self.send_stream_updates, state, response,
+                asyncio.get_running_loop()
+            )
+        with STAGE_SECONDS.time('check_response'):
+            homeworks = homework.check_response(response)
+        return bool(homeworks) and self.send_updates(state, homeworks)
+
+    async def fetch(self, state):
+        """Запрос к API с учётом автомата защиты эндпоинта."""
+        try:
+            response = await self.get_api_answer(state)
+        except Exception as error:
+            state.failures += 1
+            if is_endpoint_failure(error):
+                self.breaker.record_failure(
+                    parse_retry_after(getattr(error, 'retry_after', None))
+                )
+            else:
+                self.breaker.record_success()
+            raise
+        state.failures = 0
+        self.breaker.record_success()
+        return response
+
+    async def report_error(self, state, error):
+        """Логируем ошибку и учитываем её в сводке ошибок аккаунта."""
+        ERRORS.inc(type(error).__name__)
+        logger.error(LazyMessage(homework.MAIN_EXCEPTION_ERROR, error=error),
+                     exc_info=True)
+        state.errors.record_error(error, partial(self.send_message, state))
+
+    async def process_response(self, state, response):
+        """Обрабатываем ответ; неизменившийся (None) только учитываем."""
+        if response is None:
+            UNCHANGED_RESPONSES.inc()
+            SAVED_CPU_SECONDS.inc(amount=state.fingerprint.cost)
+            return
+        started = time.thread_time()
+        if await self.send_response_updates(state, response):
+            state.timestamp = response.get('current_date', state.timestamp)
+        state.fingerprint.commit(time.thread_time() - started)
+
+    async def poll(self, state):
+        """Один цикл для аккаунта: запрос, проверка, отправка статуса."""
+        if not self.breaker.allow_request():
+            self.postpone(state)
+            return
+        try:
+            await self.process_response(state, await self.fetch(state))
+        except Exception as error:
+            await self.report_error(state, error)
+        else:
+            state.errors.record_success(partial(self.send_message, state))
+        finally:
+            self.store.save(
+                state.account.name, state.timestamp, state.statuses,
+                state.last_error
+            )
+            self.schedule(state)
+
+    def schedule(self, state):
+        """Назначаем время следующего опроса аккаунта.
+
+        После ошибок запроса - экспоненциальная задержка с джиттером,
+        иначе - период из политики опроса, отсчитанный от назначенного
+        времени прошлого опроса, чтобы расписание не сползало.
+        """
+        now = time.monotonic()
+        if state.failures:
+            when = now + backoff_delay(state.failures - 1)
+        else:
+            when = next_due(state.next_poll, self.policy.interval(
+                state.statuses, state.last_change
+            ), now)
+        if self.breaker.opened:
+            when = max(when, self.breaker.retry_at)
+        self.set_next_poll(state, when)
+
+    def request_poll(self, state):
+        """Внеочередной опрос аккаунта: цикл run выполнит его сразу."""
+        self.set_next_poll(state, time.monotonic())
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def postpone(self, state):
+        """Откладываем опрос, пока автомат защиты не пропускает запросы."""
+        self.set_next_poll(
+            state,
+            max(self.breaker.retry_at, time.monotonic()) + backoff_delay(0)
+        )
+
+    async def poll_all(self, states=None):
+        """Опрашиваем аккаунты одновременно, по умолчанию - все."""
+        states = self.table if states is None else states
+        await asyncio.gather(*(self.poll(state) for state in states))
+        self.store.maybe_flush()
+        if self.history is not None:
+            self.history.flush()
+        if self.session is not None:
+            log_pool_stats(self.session)
+        if self.hedger is not None:
+            self.hedger.log_stats()
+
+    def stop(self):
+        """Останавливаем цикл опроса после текущих опросов (SIGTERM)."""
+        self.stopping = True
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def reload(self):
+        """Перечитываем настройки и аккаунты без остановки (SIGHUP).
+
+        HTTP-сессия, очередь отправки, кэши и состояние оставшихся
+        аккаунтов сохраняются.
+        """
+        if not homework.reload_config():
+            return
+        if isinstance(self.bot, TelegramClient):
+            self.bot.set_token(homework.TELEGRAM_TOKEN)
+        try:
+            accounts = self.account_loader()
+        except Exception as error:
+            logger.error(homework.CONFIG_RELOAD_ERROR.format(error=error))
+            return
+        added, removed = self.table.sync(accounts)
+        for state in removed:
+            self.queue.remove(state)
+        for state in added:
+            self.load_state(state)
+        logger.info(ACCOUNTS_RELOADED.format(accounts=len(self.table)))
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def add_signal_handlers(self):
+        """SIGTERM и SIGINT - остановка, SIGHUP - перезагрузка настроек."""
+        loop = asyncio.get_running_loop()
+        for signum in handled_signals():
+            handler = self.reload if signum == RELOAD_SIGNAL else self.stop
+            try:
+                loop.add_signal_handler(signum, handler)
+            except (NotImplementedError, RuntimeError, ValueError):
+                return
+
+    def remove_signal_handlers(self):
+        """Возвращаем обработку сигналов по умолчанию."""
+        loop = asyncio.get_running_loop()
+        for signum in handled_signals():
+            try:
+                loop.remove_signal_handler(signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                return
+
+    async def hold_lease(self):
+        """Ведём ли опрос: без аренды ждём её не дольше LEASE_RETRY.
+
+        Получив аренду, перечитываем состояние аккаунтов: пока опрос вёл
+        другой экземпляр, оно могло измениться.
+        """
+        if self.lease is None:
+            return True
+        if self.leading and self.lease.held:
+            return True
+        if self.leading:
+            self.leading = False
+            self.store.flush()
+        if not await self.run_blocking(self.lease.wait, LEASE_RETRY):
+            return False
+        self.leading = True
+        for state in self.table:
+            self.store.forget(state.account.name)
+            self.load_state(state)
+        return True
+
+    async def drain(self):
+        """Отправляем накопившиеся сообщения не дольше drain_timeout."""
+        try:
+            await asyncio.wait_for(self.outbox.drain(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        logger.info(ENGINE_STOPPED.format(outbox=len(self.outbox)))
+
+    async def run(self, *background):
+        """Цикл опроса до сигнала остановки.
+
+        background - корутины, которые работают вместе с опросом
+        (например, обработчик команд бота). При остановке текущие опросы
+        завершаются, а очередь отправки дочищается.
+        """
+        logger.info(ENGINE_STARTED.format(
+            accounts=len(self.table), concurrency=self.concurrency
+        ))
+        self.stopping = False
+        self.wakeup = asyncio.Event()
+        self.add_signal_handlers()
+        tasks = [asyncio.ensure_future(coroutine)
+                 for coroutine in (self.outbox.run(), *background)]
+        try:
+            while not self.stopping:
+                self.wakeup.clear()
+                if not await self.hold_lease():
+                    continue
+                await self.poll_all(self.take_due())
+                await self.wait_next_poll()
+        finally:
+            self.remove_signal_handlers()
+            for task in tasks:
+                task.cancel()
+        await self.drain()
+
+    async def wait_next_poll(self):
+        """Ждём ближайшего опроса, внеочередного опроса или остановки."""
+        next_poll = self.queue.next_due()
+        if next_poll is None:
+            next_poll = time.monotonic() + homework.RETRY_PERIOD
+        try:
+            await asyncio.wait_for(
+                self.wakeup.wait(), max(next_poll - time.monotonic(), 0)
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    def close(self):
+        """Останавливаем пул потоков."""
+        self.executor.shutdown(wait=True)
+        self.store.close()
+        if self.history is not None:
+            self.history.close()
+        if self.session is not None:
+            self.session.close()
+
+
+def check_bot_token():
+    """Проверка наличия токена бота."""
+    if not homework.TELEGRAM_TOKEN:
+        message = homework.NO_TOKEN_MESSAGE.format(token=['TELEGRAM_TOKEN'])
+        logger.critical(message)
+        raise ValueError(message)
+
+
+def main(account_loader=load_accounts, metrics_port=METRICS_PORT,
+         commands=TELEGRAM_COMMANDS, lease_name=ENGINE_LEASE_NAME):
+    """Запуск асинхронного движка.
+
+    account_loader возвращает аккаунты этого процесса (при запуске и по
+    SIGHUP), metrics_port - порт метрик, 0 - без метрик. Опрос ведёт
+    только экземпляр, получивший аренду lease_name.
+    """
+    check_bot_token()
+    homework.load_verdicts()
+    if metrics_port:
+        start_metrics_server(metrics_port)
+    table = AccountTable(account_loader())
+    session = create_session()
+    client = TelegramClient(homework.TELEGRAM_TOKEN, session)
+    keeper = LeaseKeeper(open_lease(lease_name)).start()
+    engine = PollingEngine(
+        client, table, session, open_state_store(),
+        hedger=Hedger() if HEDGE_REQUESTS else None,
+        account_loader=account_loader, lease=keeper,
+        history=open_history()
+    )
+    background = [CommandHandler(engine, client).run()] if commands else []
+    try:
+        asyncio.run(engine.run(*background))
+    finally:
+        engine.close()
+        keeper.stop()
+
+
+if __name__ == '__main__':
+    setup_logging()
+    main()
@@ -0,0 +1,101 @@
+import os
+import time
+
+ERROR_WINDOW = float(os.getenv('ERROR_WINDOW', 3600))
+ERROR_MAX_KINDS = int(os.getenv('ERROR_MAX_KINDS', 10))
+OTHER_ERRORS = 'другие'
+
+ERROR_DIGEST = 'Ошибки за последние {minutes:.0f} мин: {errors}'
+ERROR_RECOVERY = 'Работа восстановлена'
+ERROR_RECOVERY_COUNTS = 'Работа восстановлена после ошибок: {errors}'
+ERROR_COUNT = '{label} x{count}'
+
+
+def error_label(error):
+    """Вид ошибки: класс и код ответа, например TheAnswerIsNot200Error 500."""
+    status_code = getattr(error, 'status_code', None)
+    name = type(error).__name__
+    return name if status_code is None else f'{name} {status_code}'
+
+
+def count_errors(counts, label, max_kinds):
+    """Увеличиваем счётчик вида; сверх max_kinds видов - в общий."""
+    if label not in counts and len(counts) >= max_kinds:
+        label = OTHER_ERRORS
+    counts[label] = counts.get(label, 0) + 1
+
+
+def format_counts(counts):
+    """Строка вида ConnectionError x14, TheAnswerIsNot200Error 500 x3."""
+    return ', '.join(
+        ERROR_COUNT.format(label=label, count=count)
+        for label, count in sorted(
+            counts.items(), key=lambda item: item[1], reverse=True
+        )
+    )
+
+
+class ErrorAggregator:
+    """Сводка ошибок одного аккаунта вместо сообщения о каждой.
+
+    О первой ошибке каждого вида сообщаем сразу по шаблону template.
+    Повторы только считаются, и не чаще раза в window секунд уходит
+    сводка. Когда опрос снова успешен, уходит сообщение о восстановлении.
+    Видов ошибок хранится не больше max_kinds. send(message) возвращает
+    True, если сообщение ушло; состояние меняется только после отправки.
+    """
+
+    def __init__(self, template, window=ERROR_WINDOW,
+                 max_kinds=ERROR_MAX_KINDS, last_message='',
+                 clock=time.monotonic):
+        self.template = template
+        self.window = window
+        self.max_kinds = max_kinds
+        self.clock = clock
+        self.last_message = last_message
+        self.notified = set()
+        self.pending = {}
+        self.totals = {}
+        self.window_start = clock()
+
+    @property
+    def failing(self):
+        """Идёт ли сбой, о котором ещё не сообщено восстановление."""
+        return bool(self.last_message or self.totals)
+
+    def record_error(self, error, send):
+        """Учитываем ошибку и отправляем сообщение, если оно нужно."""
+        label = error_label(error)
+        now = self.clock()
+        if not self.totals:
+            self.window_start = now
+        count_errors(self.totals, label, self.max_kinds)
+        if label not in self.notified and (
+            len(self.notified) < self.max_kinds
+        ):
+            message = self.template.format(error=error)
+            if send(message):
+                self.notified.add(label)
+                self.last_message = message
+                return
+        count_errors(self.pending, label, self.max_kinds)
+        if self.pending and now - self.window_start >= self.window:
+            if send(ERROR_DIGEST.format(
+                minutes=(now - self.window_start) / 60,
+                errors=format_counts(self.pending)
+            )):
+                self.pending.clear()
+                self.window_start = now
+
+    def record_success(self, send):
+        """Опрос прошёл успешно: сообщаем о восстановлении после сбоя."""
+        if not self.failing:
+            return
+        message = ERROR_RECOVERY_COUNTS.format(
+            errors=format_counts(self.totals)
+        ) if self.totals else ERROR_RECOVERY
+        if send(message):
+            self.last_message = ''
+            self.notified.clear()
+            self.pending.clear()
+            self.totals.clear()
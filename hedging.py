@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 0.95))
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', 200))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.05))
+
+HEDGE_STATS = ('Дублирующих запросов: {sent}, из них ответили первыми: '
+               '{won}, задержка дубля {delay}')
+
+logger = logging.getLogger(__name__)
+
+
+class Hedger:
+    """Дублирующие (hedged) запросы для хвостовых задержек.
+
+    Если ответ не пришёл за перцентиль percentile от последних window
+    задержек, отправляем второй такой же запрос и берём первый успешный.
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, window=HEDGE_WINDOW,
+                 min_samples=HEDGE_MIN_SAMPLES, min_delay=HEDGE_MIN_DELAY):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.samples = deque(maxlen=window)
+        self.sent = 0
+        self.won = 0
+
+    def delay(self):
+        """Через сколько секунд отправлять дубль, None - пока рано."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(len(ordered) * self.percentile), len(ordered) - 1)
+        return max(self.min_delay, ordered[index])
+
+    async def call(self, request):
+        """Выполняем request() с дублем; request возвращает awaitable."""
+        started = time.monotonic()
+        delay = self.delay()
+        primary = asyncio.ensure_future(request())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            result = primary.result()
+            self.samples.append(time.monotonic() - started)
+            return result
+        self.sent += 1
+        hedge_started = time.monotonic()
+        hedge = asyncio.ensure_future(request())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                for other in pending:
+                    other.cancel()
+                if task is hedge:
+                    self.won += 1
+                    started = hedge_started
+                self.samples.append(time.monotonic() - started)
+                return task.result()
+        raise error
+
+    def log_stats(self):
+        """Пишем в лог, как часто дубли отвечают первыми."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(HEDGE_STATS.format(
+                sent=self.sent, won=self.won, delay=self.delay()
+            ))
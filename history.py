@@ -0,0 +1,218 @@
+"""История смен статусов работ и аналитика по ней.
+
+Запуск отчёта:
+    python history.py homework_history.bin
+Для отчёта нужен NumPy (pip install numpy), для записи истории - нет.
+"""
+import argparse
+import calendar
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+HISTORY_FILE = os.getenv('HISTORY_FILE', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'homework_history.bin'
+))
+HISTORY_BUFFER = int(os.getenv('HISTORY_BUFFER', 256))
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+PERCENTILES = (50, 90, 99)
+
+# ключ (аккаунт, работа), время смены, аккаунт, код статуса - 24 байта
+RECORD = struct.Struct('<QqIB3x')
+RECORD_FIELDS = (('key', '<u8'), ('time', '<i8'), ('account', '<u4'),
+                 ('status', 'u1'))
+STATUS_CODES = {'reviewing': 1, 'approved': 2, 'rejected': 3}
+
+NUMPY_REQUIRED = 'Для аналитики истории нужен NumPy: pip install numpy'
+REPORT = ('Смен статусов: {records}, проверок: {reviews}\n'
+          'Время проверки, ч: {turnaround}\n'
+          'Доля возвратов на доработку: {rejection_rate:.1%}\n'
+          'Смены статусов по часам:\n{hourly}')
+PERCENTILE_LINE = 'p{percentile}={hours:.1f}'
+HOUR_LINE = '{hour:02d}:00 {count}'
+NO_REVIEWS = 'нет данных'
+
+ReviewStats = namedtuple(
+    'ReviewStats',
+    ('records', 'reviews', 'turnaround', 'rejection_rate', 'hourly')
+)
+
+
+def row_key(account, key):
+    """64-битный ключ пары (аккаунт, работа)."""
+    return int.from_bytes(hashlib.blake2b(
+        f'{account}\0{key}'.encode(), digest_size=8
+    ).digest(), 'little')
+
+
+def parse_time(date_updated):
+    """date_updated API в секундах Unix или None."""
+    try:
+        return calendar.timegm(time.strptime(date_updated, DATE_FORMAT))
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryStore:
+    """Файл смен статусов из записей фиксированной длины.
+
+    Файл только дописывается: записи копятся в буфере и уходят одним
+    вызовом write в режиме O_APPEND, поэтому несколько процессов могут
+    писать в один файл. Недописанная запись в конце отрезается при
+    открытии. Время смены - date_updated из ответа API, если он есть.
+    """
+
+    def __init__(self, path=HISTORY_FILE, buffer_size=HISTORY_BUFFER):
+        self.path = path
+        self.buffer_size = buffer_size * RECORD.size
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        self.file = open(path, 'ab', buffering=0)
+        size = os.fstat(self.file.fileno()).st_size
+        if size % RECORD.size:
+            self.file.truncate(size - size % RECORD.size)
+
+    def append(self, account, key, status, date_updated=None, now=None):
+        """Добавляем смену статуса работы key аккаунта account."""
+        when = parse_time(date_updated)
+        if when is None:
+            when = int(time.time() if now is None else now)
+        record = RECORD.pack(
+            row_key(account, key), when, zlib.crc32(account.encode()),
+            STATUS_CODES.get(status, 0)
+        )
+        with self.lock:
+            self.buffer += record
+            if len(self.buffer) >= self.buffer_size:
+                self.write()
+
+    def write(self):
+        """Пишем буфер в файл; вызывается под self.lock."""
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def flush(self):
+        """Пишем накопленные записи."""
+        with self.lock:
+            self.write()
+
+    def close(self):
+        """Пишем накопленные записи и закрываем файл."""
+        self.flush()
+        self.file.close()
+
+
+def open_history(path=None):
+    """Файл истории; пустой HISTORY_FILE - история не пишется."""
+    path = HISTORY_FILE if path is None else path
+    return HistoryStore(path) if path else None
+
+
+def read_history(path=HISTORY_FILE):
+    """Записи файла истории кортежами без NumPy."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    return list(RECORD.iter_unpack(data[:len(data) // RECORD.size
+                                        * RECORD.size]))
+
+
+def require_numpy():
+    """Модуль numpy или понятная ошибка, если он не установлен."""
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(NUMPY_REQUIRED) from error
+    return numpy
+
+
+def record_dtype(numpy):
+    """Тип записи файла истории для NumPy."""
+    return numpy.dtype({
+        'names': [name for name, _ in RECORD_FIELDS],
+        'formats': [kind for _, kind in RECORD_FIELDS],
+        'offsets': [0, 8, 16, 20], 'itemsize': RECORD.size,
+    })
+
+
+def load_history(path=HISTORY_FILE):
+    """Файл истории как массив NumPy, отображённый в память."""
+    numpy = require_numpy()
+    count = os.path.getsize(path) // RECORD.size
+    if not count:
+        return numpy.zeros(0, dtype=record_dtype(numpy))
+    return numpy.memmap(
+        path, dtype=record_dtype(numpy), mode='r', shape=(count,)
+    )
+
+
+def review_stats(records, percentiles=PERCENTILES, utc_offset=None):
+    """Время проверки, доля возвратов и активность по часам.
+
+    Время проверки - от reviewing до следующего approved или rejected
+    той же работы. Часы - местные, со сдвигом utc_offset секунд.
+    """
+    numpy = require_numpy()
+    if utc_offset is None:
+        utc_offset = time.localtime().tm_gmtoff
+    order = numpy.lexsort((records['time'], records['key']))
+    keys = records['key'][order]
+    times = records['time'][order]
+    statuses = records['status'][order]
+    verdicts = (statuses == STATUS_CODES['approved']) | (
+        statuses == STATUS_CODES['rejected']
+    )
+    reviewed = (keys[1:] == keys[:-1]) & verdicts[1:] & (
+        statuses[:-1] == STATUS_CODES['reviewing']
+    )
+    turnaround = (times[1:] - times[:-1])[reviewed]
+    rejected = numpy.count_nonzero(statuses == STATUS_CODES['rejected'])
+    total_verdicts = numpy.count_nonzero(verdicts)
+    return ReviewStats(
+        records=len(records),
+        reviews=len(turnaround),
+        turnaround=dict(zip(
+            percentiles, numpy.percentile(turnaround, percentiles).tolist()
+        )) if len(turnaround) else {},
+        rejection_rate=rejected / total_verdicts if total_verdicts else 0,
+        hourly=numpy.bincount(
+            (times + utc_offset) // 3600 % 24, minlength=24
+        ).tolist()
+    )
+
+
+def format_stats(stats):
+    """Текстовый отчёт по ReviewStats."""
+    return REPORT.format(
+        records=stats.records, reviews=stats.reviews,
+        turnaround=', '.join(
+            PERCENTILE_LINE.format(percentile=percentile, hours=value / 3600)
+            for percentile, value in stats.turnaround.items()
+        ) or NO_REVIEWS,
+        rejection_rate=stats.rejection_rate,
+        hourly='\n'.join(
+            HOUR_LINE.format(hour=hour, count=count)
+            for hour, count in enumerate(stats.hourly)
+        )
+    )
+
+
+def parse_args(args=None):
+    """Аргументы командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=HISTORY_FILE)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Печатаем отчёт по файлу истории."""
+    args = parse_args(args)
+    print(format_stats(review_stats(load_history(args.path))))
+
+
+if __name__ == '__main__':
+    main()
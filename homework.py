@@ -1,12 +1,26 @@
+import hashlib
+import json
 import logging
 import os
 import sys
 import time
+from collections import namedtuple
+from functools import lru_cache, partial
+from operator import itemgetter
 
-import requests
-import telegram
 from dotenv import load_dotenv
 
+from error_digest import ErrorAggregator
+from lazy import lazy_import
+from history import open_history
+from lease import LEASE_BUSY, LeaseKeeper, open_lease
+from lifecycle import SignalHandler
+from log_config import LazyMessage, setup_logging
+from storage import open_state_store
+
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
+
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
@@ -14,7 +28,14 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+API_TIMEOUT = (
+    float(os.getenv('API_CONNECT_TIMEOUT', 5)),
+    float(os.getenv('API_READ_TIMEOUT', 30))
+)
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 HOMEWORK_VERDICTS = {
@@ -23,6 +44,13 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 TOKENS = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
+DEFAULT_ACCOUNT = 'default'
+RETRY_AFTER_CODES = (429, 503)
+NOT_MODIFIED = 304
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', 1024))
+TEMPLATE_LOCALE = 'ru'
+LEASE_NAME = os.getenv('LEASE_NAME', 'homework')
 
 NO_TOKEN_MESSAGE = ('Программа принудительно остановлена. '
                     'Отсутствует обязательная переменная окружения: {token}')
@@ -45,6 +73,8 @@ MAIN_EXCEPTION_ERROR = 'Сбой в работе программы: {error}'
 RESPONSE_ERROR = ('В ключе ответа {response_json} есть ошибка {response_error}'
                   '. Переданы параметры {parameters}')
 NOCHANGE_HOMEWORK_STATUS = 'Статус домашней работы не изменился'
+CONFIG_RELOADED = 'Настройки перечитаны'
+CONFIG_RELOAD_ERROR = 'Не удалось перечитать настройки: {error}'
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +82,11 @@ logger = logging.getLogger(__name__)
 class TheAnswerIsNot200Error(Exception):
     """Ответ сервера не равен 200."""
 
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
 
 class RequestExceptionError(Exception):
     """Ошибка запроса."""
@@ -75,9 +110,14 @@ def check_tokens():
 
 def send_message(bot, message):
     """Отправляем сообщение в Телеграм."""
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправляем сообщение в указанный чат Телеграм."""
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug(TELEGRAM_MESSAGE_SENT.format(message=message))
+        bot.send_message(chat_id, message)
+        logger.debug(LazyMessage(TELEGRAM_MESSAGE_SENT, message=message))
         return True
     except telegram.TelegramError as telegram_error:
         logger.error(TELEGRAM_MESSAGE_NOT_SENT.format(
@@ -88,87 +128,459 @@ def send_message(bot, message):
 
 def get_api_answer(timestamp):
     """Получение данных с API YP."""
+    return request_api_answer(HEADERS, timestamp)
+
+
+def send_api_request(headers, timestamp, session=None, timeout=API_TIMEOUT,
+                     **options):
+    """Запрос к API YP: ответ requests с кодом 200 и параметры запроса.
+
+    options передаются в requests как есть, например stream=True.
+    """
     parameters = dict(
         url=ENDPOINT,
-        headers=HEADERS,
-        params={'from_date': timestamp}
+        headers=headers,
+        params={'from_date': timestamp},
+        timeout=timeout
     )
     try:
-        response = requests.get(**parameters)
+        http_get = requests.get if session is None else session.get
+        response = http_get(**parameters, **options)
     except requests.exceptions.RequestException as request_error:
-        raise ConnectionError(REQUEST_ERROR.format(
-            request_error=request_error, parameters=parameters
-        ))
-    if response.status_code != 200:
-        raise TheAnswerIsNot200Error(STATUS_CODE_200_ERROR.format(
-            status_code=response.status_code, parameters=parameters
+        raise ConnectionError(LazyMessage(
+            REQUEST_ERROR, request_error=request_error, parameters=parameters
         ))
-    response_json = response.json()
+    if response.status_code != 200 and not (
+        response.status_code == NOT_MODIFIED
+        and any(header in headers for header in CONDITIONAL_HEADERS)
+    ):
+        raise TheAnswerIsNot200Error(
+            LazyMessage(
+                STATUS_CODE_200_ERROR, status_code=response.status_code,
+                parameters=parameters
+            ),
+            status_code=response.status_code,
+            retry_after=(response.headers.get('Retry-After')
+                         if response.status_code in RETRY_AFTER_CODES
+                         else None)
+        )
+    return response, parameters
+
+
+def check_api_error(response_json, parameters):
+    """Ответ с ключом code или error - ошибка API."""
     for error in ('code', 'error'):
         if error in response_json:
-            raise ResponseException(RESPONSE_ERROR.format(
+            raise ResponseException(LazyMessage(
+                RESPONSE_ERROR,
                 response_json=response_json[error],
                 response_error=error,
                 parameters=parameters
             ))
+
+
+def request_api_answer(headers, timestamp, session=None,
+                       timeout=API_TIMEOUT):
+    """Получение данных с API YP с заголовками конкретного аккаунта.
+
+    Если передана сессия, запрос идёт через её пул keep-alive соединений.
+    timeout - пара (подключение, чтение) в секундах.
+    """
+    response, parameters = send_api_request(
+        headers, timestamp, session, timeout
+    )
+    response_json = response.json()
+    check_api_error(response_json, parameters)
+    return response_json
+
+
+class ResponseFingerprint:
+    """Отпечаток последнего обработанного ответа API аккаунта.
+
+    digest - хеш тела ответа, etag и last_modified - заголовки для
+    условного запроса, cost - процессорное время разбора, проверки и
+    поиска изменений этого ответа. Новый отпечаток запоминается в pending
+    и становится текущим в commit, только когда ответ обработан без
+    ошибок.
+    """
+
+    __slots__ = ('digest', 'etag', 'last_modified', 'cost', 'pending')
+
+    def __init__(self):
+        self.digest = self.etag = self.last_modified = self.pending = None
+        self.cost = 0
+
+    def conditional(self, headers):
+        """Заголовки запроса с If-None-Match и If-Modified-Since."""
+        headers = dict(headers)
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def commit(self, cost):
+        """Ответ обработан: его отпечаток становится текущим."""
+        if self.pending is None:
+            return
+        self.digest, self.etag, self.last_modified, decode_cost = (
+            self.pending
+        )
+        self.cost = decode_cost + cost
+        self.pending = None
+
+
+def request_api_changes(headers, timestamp, fingerprint, session=None,
+                        timeout=API_TIMEOUT):
+    """Как request_api_answer, но None, если ответ не изменился.
+
+    Ответ не изменился, если сервер ответил 304 на условный запрос или
+    хеш тела совпал с последним обработанным: тогда JSON не разбирается.
+    """
+    response, parameters = send_api_request(
+        fingerprint.conditional(headers), timestamp, session, timeout
+    )
+    if response.status_code == NOT_MODIFIED:
+        return None
+    digest = hashlib.blake2b(response.content, digest_size=16).digest()
+    if digest == fingerprint.digest:
+        return None
+    started = time.thread_time()
+    response_json = response.json()
+    check_api_error(response_json, parameters)
+    fingerprint.pending = (
+        digest, response.headers.get('ETag'),
+        response.headers.get('Last-Modified'), time.thread_time() - started
+    )
     return response_json
 
 
+RESPONSE_SCHEMA = dict(
+    list_key='homeworks',
+    required=('homework_name', 'status'),
+    optional=('id', 'date_updated'),
+    choices={'status': HOMEWORK_VERDICTS},
+)
+HomeworkRecord = namedtuple(
+    'HomeworkRecord', RESPONSE_SCHEMA['required'] + RESPONSE_SCHEMA['optional']
+)
+
+
+def homework_error(homework, required):
+    """Исключение для работы без обязательного поля."""
+    if not isinstance(homework, dict):
+        return TypeError(API_DICT_ERROR.format(data_type=type(homework)))
+    missed = [field for field in required if field not in homework]
+    return ValueError(EMPTY_VALUE_ERROR.format(value=missed[0]))
+
+
+def compile_validator(schema, record=HomeworkRecord):
+    """Собираем из схемы функции проверки ответа и одной работы.
+
+    Все поля работы достаются одним itemgetter, тексты ошибок
+    формируются только при ошибке. Возвращаем пару функций
+    (проверка ответа, проверка работы), обе отдают записи record.
+    """
+    list_key = schema['list_key']
+    required = schema['required']
+    optional = schema['optional']
+    get_required = itemgetter(*required)
+    choices = tuple(
+        (required.index(field), allowed)
+        for field, allowed in schema['choices'].items()
+    )
+    new_record = tuple.__new__
+
+    def validate_homework(homework):
+        try:
+            values = get_required(homework)
+        except (KeyError, TypeError):
+            raise homework_error(homework, required) from None
+        for index, allowed in choices:
+            if values[index] not in allowed:
+                raise ValueError(STATUS_NOT_IN_HOMEWORK_VERDICTS.format(
+                    value=values[index]
+                ))
+        return new_record(record, values + tuple(map(homework.get, optional)))
+
+    def validate_response(response):
+        if not isinstance(response, dict):
+            raise TypeError(API_DICT_ERROR.format(data_type=type(response)))
+        if list_key not in response:
+            raise KeyError(NO_KEY_ERROR.format(key=list_key))
+        homeworks = response[list_key]
+        if not isinstance(homeworks, list):
+            raise TypeError(API_LIST_ERROR.format(data_type=type(homeworks)))
+        return list(map(validate_homework, homeworks))
+
+    return validate_response, validate_homework
+
+
+validate_response, validate_homework = compile_validator(RESPONSE_SCHEMA)
+
+
 def check_response(response):
-    """Проверяем данные в response."""
-    if not isinstance(response, dict):
-        raise TypeError(API_DICT_ERROR.format(data_type=type(response)))
-    if 'homeworks' not in response:
-        raise KeyError(NO_KEY_ERROR.format(key='homeworks'))
-    homeworks = response['homeworks']
-    if not isinstance(homeworks, list):
-        raise TypeError(API_LIST_ERROR.format(data_type=type(homeworks)))
-    return homeworks
+    """Проверяем данные в response и каждую работу за один проход."""
+    return validate_response(response)
+
+
+template_version = 0
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def format_status(version, homework_name, status, locale=TEMPLATE_LOCALE):
+    """Текст сообщения о статусе.
+
+    Результат кэшируется: одинаковые (название, статус) при опросе
+    многих аккаунтов форматируются один раз. version и locale входят в
+    ключ кэша, чтобы после перезагрузки шаблонов не отдать старый текст.
+    """
+    return CHANGE_HOMEWORK_STATUS.format(
+        homework_name=homework_name,
+        verdict=HOMEWORK_VERDICTS[status]
+    )
+
+
+def render_status(record):
+    """Сообщение о статусе уже проверенной работы."""
+    return format_status(
+        template_version, record.homework_name, record.status,
+        TEMPLATE_LOCALE
+    )
+
+
+def reload_templates(verdicts=None, template=None):
+    """Обновляем вердикты и шаблон сообщения и сбрасываем кэш сообщений.
+
+    Словарь HOMEWORK_VERDICTS меняется на месте, поэтому проверка
+    статусов в validate_homework сразу видит новые вердикты.
+    """
+    global CHANGE_HOMEWORK_STATUS, template_version
+    if verdicts is not None:
+        HOMEWORK_VERDICTS.clear()
+        HOMEWORK_VERDICTS.update(verdicts)
+    if template is not None:
+        CHANGE_HOMEWORK_STATUS = template
+    template_version += 1
+    format_status.cache_clear()
+
+
+def load_verdicts():
+    """Вердикты из JSON-файла VERDICTS_FILE, если он задан.
+
+    Кэш сообщений сбрасывается, только если вердикты изменились.
+    """
+    path = os.getenv('VERDICTS_FILE')
+    if not path:
+        return
+    with open(path, encoding='utf-8') as file:
+        verdicts = json.load(file)
+    if verdicts != HOMEWORK_VERDICTS:
+        reload_templates(verdicts)
+
+
+def reload_config():
+    """Перечитываем токены из окружения и .env и вердикты (SIGHUP).
+
+    При ошибке остаются прежние настройки. Возвращаем True, если
+    настройки перечитаны.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+    try:
+        load_dotenv(override=True)
+        load_verdicts()
+    except (OSError, ValueError) as error:
+        logger.error(CONFIG_RELOAD_ERROR.format(error=error))
+        return False
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    HEADERS['Authorization'] = f'OAuth {PRACTICUM_TOKEN}'
+    logger.info(CONFIG_RELOADED)
+    return True
 
 
 def parse_status(homeworks):
     """Анализируем статус если изменился."""
-    status = homeworks.get('status')
-    homework_name = homeworks.get('homework_name')
-    if 'status' not in homeworks:
-        raise ValueError(EMPTY_VALUE_ERROR.format(value=status))
-    if 'homework_name' not in homeworks:
-        raise ValueError(EMPTY_VALUE_ERROR.format(value=homework_name))
-    if status not in HOMEWORK_VERDICTS:
-        raise ValueError(STATUS_NOT_IN_HOMEWORK_VERDICTS.format(value=status))
-    return CHANGE_HOMEWORK_STATUS.format(
-        homework_name=homework_name, verdict=HOMEWORK_VERDICTS[status]
+    return render_status(validate_homework(homeworks))
+
+
+def homework_key(record):
+    """Ключ работы в индексе статусов: id, а если его нет - название."""
+    return str(record.homework_name if record.id is None else record.id)
+
+
+def iter_updates(homeworks, statuses, render=None):
+    """Отбираем за один проход работы, статус которых изменился.
+
+    homeworks - записи из check_response (или любой их итератор),
+    statuses - индекс {ключ работы: [статус, date_updated]} с последними
+    отправленными статусами. render - функция текста сообщения, по
+    умолчанию render_status. Отдаём по мере разбора (ключ, запись,
+    сообщение).
+    """
+    render = render_status if render is None else render
+    for record in homeworks:
+        entry = [record.status, record.date_updated]
+        key = homework_key(record)
+        if statuses.get(key) != entry:
+            yield key, entry, render(record)
+
+
+def collect_updates(homeworks, statuses, render=None):
+    """Список изменений из iter_updates."""
+    return list(iter_updates(homeworks, statuses, render))
+
+
+def send_updates(bot, homeworks, statuses, history=None):
+    """Отправляем сообщения обо всех изменившихся работах.
+
+    Отправленные смены статусов дописываются в history, если он задан.
+    """
+    sent = True
+    for key, entry, message in collect_updates(homeworks, statuses):
+        if send_message(bot, message):
+            statuses[key] = entry
+            if history is not None:
+                history.append(DEFAULT_ACCOUNT, key, *entry)
+        else:
+            sent = False
+    return sent
+
+
+class LazyBot:
+    """Бот Telegram, который создаётся при первой отправке сообщения.
+
+    Если в этот раз отправлять нечего, telegram даже не загружается.
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.bot = None
+
+    def send_message(self, *args, **kwargs):
+        """Отправляем сообщение, при необходимости создав бота."""
+        if self.bot is None:
+            self.bot = telegram.Bot(token=self.token)
+        return self.bot.send_message(*args, **kwargs)
+
+
+def poll_cycle(bot, timestamp, statuses, errors, history=None):
+    """Один цикл: запрос к API, проверка и отправка изменившихся статусов.
+
+    Возвращаем новый timestamp, statuses обновляется на месте. Об
+    ошибках сообщает сводка errors (ErrorAggregator), смены статусов
+    пишутся в history.
+    """
+    try:
+        response = get_api_answer(timestamp)
+        homeworks = check_response(response)
+        if homeworks and send_updates(bot, homeworks, statuses, history):
+            timestamp = response.get('current_date', timestamp)
+    except Exception as error:
+        logger.error(LazyMessage(MAIN_EXCEPTION_ERROR, error=error),
+                     exc_info=True)
+        errors.record_error(error, partial(send_message, bot))
+    else:
+        errors.record_success(partial(send_message, bot))
+    return timestamp
+
+
+def load_account_state(store):
+    """Состояние аккаунта из хранилища и сводка ошибок для него."""
+    store.forget(DEFAULT_ACCOUNT)
+    timestamp, statuses, last_error_message = store.load(DEFAULT_ACCOUNT)
+    return timestamp, statuses, ErrorAggregator(
+        MAIN_EXCEPTION_ERROR, last_message=last_error_message
     )
 
 
+def wait_lease(keeper, store, signals):
+    """Ждём аренду опроса, пока её держит другой экземпляр бота."""
+    store.flush()
+    with signals.interruptible():
+        if not signals.pending:
+            keeper.wait()
+
+
 def main():
-    """Главная функция запуска бота."""
+    """Главная функция запуска бота.
+
+    SIGTERM завершает работу после текущего цикла с сохранением
+    состояния, SIGHUP перечитывает токены и вердикты. Опрос ведёт только
+    экземпляр, получивший аренду LEASE_NAME, остальные ждут её.
+    """
     check_tokens()
+    load_verdicts()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = 0
-    last_error_message = ''
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            if homeworks and send_message(bot, parse_status(homeworks[0])):
-                timestamp = response.get('current_date', timestamp)
-        except Exception as error:
-            message_error = MAIN_EXCEPTION_ERROR.format(error=error)
-            logger.error(message_error, exc_info=True)
-            if (message_error != last_error_message
-                    and send_message(bot, message_error)):
-                last_error_message = message_error
-        finally:
-            time.sleep(RETRY_PERIOD)
+    store = open_state_store()
+    signals = SignalHandler().install()
+    keeper = LeaseKeeper(open_lease(LEASE_NAME)).start()
+    history = open_history()
+    leading = False
+    try:
+        while not signals.stopping:
+            if (signals.take_reload() and reload_config()
+                    and bot.token != TELEGRAM_TOKEN):
+                bot = telegram.Bot(token=TELEGRAM_TOKEN)
+            leading = leading and keeper.held
+            if not keeper.held:
+                wait_lease(keeper, store, signals)
+                continue
+            if not leading:
+                timestamp, statuses, errors = load_account_state(store)
+                leading = True
+            try:
+                timestamp = poll_cycle(
+                    bot, timestamp, statuses, errors, history
+                )
+            finally:
+                store.save(
+                    DEFAULT_ACCOUNT, timestamp, statuses, errors.last_message
+                )
+                store.maybe_flush()
+                if history is not None:
+                    history.flush()
+                with signals.interruptible():
+                    if not signals.pending:
+                        time.sleep(RETRY_PERIOD)
+    finally:
+        signals.restore()
+        store.close()
+        keeper.stop()
+        if history is not None:
+            history.close()
+
+
+def once():
+    """Один цикл опроса и выход - для запуска по расписанию (cron).
+
+    Если аренду опроса держит другой экземпляр, цикл пропускается.
+    """
+    check_tokens()
+    load_verdicts()
+    lease = open_lease(LEASE_NAME)
+    if not lease.acquire():
+        logger.info(LEASE_BUSY.format(name=LEASE_NAME))
+        return
+    store = open_state_store()
+    history = open_history()
+    try:
+        timestamp, statuses, errors = load_account_state(store)
+        timestamp = poll_cycle(
+            LazyBot(TELEGRAM_TOKEN), timestamp, statuses, errors, history
+        )
+        store.save(DEFAULT_ACCOUNT, timestamp, statuses, errors.last_message)
+    finally:
+        store.close()
+        lease.release()
+        if history is not None:
+            history.close()
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(module)s - %(name)s - '
-               '%(funcName)s: %(lineno)d - %(message)s',
-        handlers=[logging.StreamHandler(stream=sys.stdout),
-                  logging.FileHandler(filename=__file__ + '.log', mode='w')]
-    )
-    main()
+    setup_logging(__file__ + '.log')
+    if sys.argv[1:] == ['once']:
+        once()
+    else:
+        main()
@@ -0,0 +1,55 @@
+import logging
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 100))
+POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'false').lower() == 'true'
+
+POOL_STATS = ('HTTP-пул: открыто соединений {connections}, '
+              'запросов {requests}, переиспользовано {reused}')
+
+logger = logging.getLogger(__name__)
+
+
+def create_session(pool_connections=POOL_CONNECTIONS,
+                   pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK):
+    """Создаём общую сессию с пулом keep-alive соединений.
+
+    pool_connections - сколько хостов держать в пуле,
+    pool_maxsize - сколько соединений держать к одному хосту,
+    pool_block - ждать свободного соединения вместо открытия лишнего.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def pool_stats(session):
+    """Счётчики открытых соединений и запросов по всем хостам сессии."""
+    connections = requests_qty = 0
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools[key]
+            connections += pool.num_connections
+            requests_qty += pool.num_requests
+    return dict(
+        connections=connections,
+        requests=requests_qty,
+        reused=requests_qty - connections
+    )
+
+
+def log_pool_stats(session):
+    """Пишем в лог счётчики переиспользования соединений."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(POOL_STATS.format(**pool_stats(session)))
@@ -0,0 +1,19 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Модуль, который загружается при первом обращении к атрибуту.
+
+    Тяжёлые зависимости (telegram, requests) не тормозят запуск, если в
+    этот раз они не понадобились. Уже загруженный модуль отдаётся как есть.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,220 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from storage import STATE_DB
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LEASE_BACKEND = os.getenv('LEASE_BACKEND', 'file')
+LEASE_DIR = os.getenv(
+    'LEASE_DIR', os.path.dirname(os.path.abspath(__file__))
+)
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))
+LEASE_RETRY = float(os.getenv('LEASE_RETRY', 5))
+
+UNKNOWN_LEASE_ERROR = 'Неизвестный способ аренды: {backend}'
+NO_FCNTL_ERROR = 'Аренда через файл недоступна на этой платформе'
+LEASE_ACQUIRED = 'Аренда {name} получена: опрос ведёт {holder}'
+LEASE_LOST = 'Аренда {name} потеряна: опрос приостановлен'
+LEASE_BUSY = 'Аренда {name} занята другим экземпляром, ждём'
+LEASE_ERROR = 'Не удалось продлить аренду {name}: {error}'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS lease (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires REAL NOT NULL
+)
+'''
+UPSERT_LEASE = '''
+INSERT INTO lease (name, holder, expires) VALUES (?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET
+    holder = excluded.holder, expires = excluded.expires
+WHERE lease.holder = excluded.holder OR lease.expires < ?
+'''
+SELECT_HOLDER = 'SELECT holder FROM lease WHERE name = ?'
+DELETE_LEASE = 'DELETE FROM lease WHERE name = ? AND holder = ?'
+
+logger = logging.getLogger(__name__)
+
+
+def lease_holder():
+    """Имя экземпляра: хост и pid."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class NullLease:
+    """Аренда без соперников: экземпляр всегда ведёт опрос."""
+
+    renew_period = LEASE_TTL
+
+    def __init__(self, name):
+        self.name = name
+        self.holder = lease_holder()
+
+    def acquire(self):
+        """Получаем или продлеваем аренду; True, если она наша."""
+        return True
+
+    def release(self):
+        """Отпускаем аренду."""
+
+
+class FileLease(NullLease):
+    """Аренда через flock на файл в LEASE_DIR.
+
+    Продлевать её не нужно: блокировку держит открытый файл, и ядро
+    снимает её, как только процесс-владелец завершается. Подходит для
+    экземпляров на одной машине или с общим томом.
+    """
+
+    def __init__(self, name, directory=LEASE_DIR):
+        if fcntl is None:
+            raise ValueError(NO_FCNTL_ERROR)
+        super().__init__(name)
+        self.path = os.path.join(directory, f'{name}.lock')
+        self.file = None
+
+    def acquire(self):
+        """Получаем или продлеваем аренду; True, если она наша."""
+        if self.file is not None:
+            return True
+        file = open(self.path, 'a+')
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return False
+        file.seek(0)
+        file.truncate()
+        file.write(self.holder)
+        file.flush()
+        self.file = file
+        return True
+
+    def release(self):
+        """Отпускаем аренду."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class SQLiteLease(NullLease):
+    """Аренда в виде строки таблицы lease базы состояния.
+
+    Продление - один UPSERT, который меняет строку, только если она
+    наша или срок прежнего владельца истёк. Если владелец завершился,
+    не отпустив аренду, её забирают через ttl секунд.
+    """
+
+    def __init__(self, name, path=STATE_DB, ttl=LEASE_TTL,
+                 clock=time.time):
+        super().__init__(name)
+        self.ttl = ttl
+        self.renew_period = ttl / 3
+        self.clock = clock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(SCHEMA)
+
+    def acquire(self):
+        """Получаем или продлеваем аренду; True, если она наша."""
+        now = self.clock()
+        with self.connection:
+            self.connection.execute(
+                UPSERT_LEASE, (self.name, self.holder, now + self.ttl, now)
+            )
+        row = self.connection.execute(
+            SELECT_HOLDER, (self.name,)
+        ).fetchone()
+        return row is not None and row[0] == self.holder
+
+    def release(self):
+        """Отпускаем аренду."""
+        with self.connection:
+            self.connection.execute(DELETE_LEASE, (self.name, self.holder))
+        self.connection.close()
+
+
+def open_lease(name, backend=None):
+    """Создаём аренду по имени способа: file, sqlite или none."""
+    backend = LEASE_BACKEND if backend is None else backend
+    if backend == 'file':
+        return FileLease(name)
+    if backend == 'sqlite':
+        return SQLiteLease(name)
+    if backend == 'none':
+        return NullLease(name)
+    raise ValueError(UNKNOWN_LEASE_ERROR.format(backend=backend))
+
+
+class LeaseKeeper(threading.Thread):
+    """Фоновый поток, который держит аренду.
+
+    Пока аренда наша, она продлевается раз в lease.renew_period, иначе
+    попытка получить её повторяется раз в retry секунд. Цикл опроса
+    только проверяет held и ждёт в wait().
+    """
+
+    def __init__(self, lease, retry=LEASE_RETRY):
+        super().__init__(name=f'lease-{lease.name}', daemon=True)
+        self.lease = lease
+        self.retry = retry
+        self.acquired = threading.Event()
+        self.stopped = threading.Event()
+
+    @property
+    def held(self):
+        """Наша ли сейчас аренда."""
+        return self.acquired.is_set()
+
+    def renew(self):
+        """Одна попытка получить или продлить аренду."""
+        try:
+            held = self.lease.acquire()
+        except (OSError, sqlite3.Error) as error:
+            logger.warning(LEASE_ERROR.format(
+                name=self.lease.name, error=error
+            ))
+            held = False
+        if held and not self.held:
+            logger.info(LEASE_ACQUIRED.format(
+                name=self.lease.name, holder=self.lease.holder
+            ))
+            self.acquired.set()
+        elif not held and self.held:
+            logger.warning(LEASE_LOST.format(name=self.lease.name))
+            self.acquired.clear()
+        return held
+
+    def start(self):
+        """Первая попытка - сразу, дальше - в фоновом потоке."""
+        if not self.renew():
+            logger.info(LEASE_BUSY.format(name=self.lease.name))
+        super().start()
+        return self
+
+    def run(self):
+        """Продлеваем аренду до остановки."""
+        while not self.stopped.wait(
+            self.lease.renew_period if self.held else self.retry
+        ):
+            self.renew()
+
+    def wait(self, timeout=None):
+        """Ждём, пока аренда станет нашей."""
+        return self.acquired.wait(timeout)
+
+    def stop(self):
+        """Останавливаем поток и отпускаем аренду."""
+        self.stopped.set()
+        if self.is_alive():
+            self.join()
+        self.acquired.clear()
+        self.lease.release()
@@ -0,0 +1,83 @@
+import logging
+import signal
+from contextlib import contextmanager
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+RELOAD_SIGNAL = getattr(signal, 'SIGHUP', None)
+
+SIGNAL_RECEIVED = 'Получен сигнал {signal}'
+
+logger = logging.getLogger(__name__)
+
+
+def handled_signals():
+    """Сигналы остановки и, если есть на платформе, перезагрузки."""
+    if RELOAD_SIGNAL is None:
+        return STOP_SIGNALS
+    return STOP_SIGNALS + (RELOAD_SIGNAL,)
+
+
+class Interrupted(BaseException):
+    """Ожидание прервано сигналом."""
+
+
+class SignalHandler:
+    """Сигналы для синхронного цикла homework.main.
+
+    SIGTERM и SIGINT - остановиться после текущего цикла, SIGHUP -
+    перечитать настройки перед следующим. Цикл не прерывается посреди
+    запроса или отправки, а ожидание в interruptible() заканчивается
+    сразу.
+    """
+
+    def __init__(self):
+        self.stopping = False
+        self.reload = False
+        self.sleeping = False
+        self.previous = {}
+
+    @property
+    def pending(self):
+        """Есть ли сигнал, после которого ждать не нужно."""
+        return self.stopping or self.reload
+
+    def install(self):
+        """Ставим обработчики; вне главного потока сигналы не ловим."""
+        try:
+            for signum in handled_signals():
+                self.previous[signum] = signal.signal(signum, self.handle)
+        except ValueError:
+            self.restore()
+        return self
+
+    def restore(self):
+        """Возвращаем прежние обработчики сигналов."""
+        for signum, handler in self.previous.items():
+            signal.signal(signum, handler)
+        self.previous.clear()
+
+    def handle(self, signum, frame):
+        """Запоминаем сигнал и прерываем ожидание."""
+        logger.info(SIGNAL_RECEIVED.format(signal=signal.Signals(signum).name))
+        if signum == RELOAD_SIGNAL:
+            self.reload = True
+        else:
+            self.stopping = True
+        if self.sleeping:
+            raise Interrupted
+
+    def take_reload(self):
+        """Нужно ли перечитать настройки; флаг сбрасывается."""
+        reload, self.reload = self.reload, False
+        return reload
+
+    @contextmanager
+    def interruptible(self):
+        """Блок ожидания, который прерывается сигналом."""
+        self.sleeping = True
+        try:
+            yield
+        except Interrupted:
+            pass
+        finally:
+            self.sleeping = False
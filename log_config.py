@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG').upper()
+LOG_FILE = os.getenv('LOG_FILE')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')
+TEXT_FORMAT = ('%(asctime)s - %(levelname)s - %(module)s - %(name)s - '
+               '%(funcName)s: %(lineno)d - %(message)s')
+
+
+class LazyMessage:
+    """Сообщение по шаблону str.format, которое собирается только при выводе.
+
+    Годится и как сообщение лога, и как текст исключения: шаблон с
+    большим словарём parameters не форматируется, пока текст не нужен.
+    """
+
+    __slots__ = ('template', 'kwargs')
+
+    def __init__(self, template, **kwargs):
+        self.template = template
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return self.template.format(**self.kwargs)
+
+    def __repr__(self):
+        return repr(str(self))
+
+
+class JSONFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        """Поля записи в JSON, с трассировкой исключения если есть."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'name': record.name,
+            'function': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись в потоке опроса.
+
+    Очередь живёт внутри процесса, поэтому запись кладётся как есть, а
+    сообщение собирается и пишется в поток слушателя.
+    """
+
+    def prepare(self, record):
+        """Запись без предварительного форматирования."""
+        return record
+
+
+def make_handlers(log_file=None, log_format=LOG_FORMAT,
+                  max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                  when=LOG_ROTATE_WHEN):
+    """Обработчики для слушателя очереди: stdout и файл с ротацией.
+
+    when задаёт ротацию по времени (например, midnight), иначе файл
+    ротируется при достижении max_bytes.
+    """
+    handlers = [logging.StreamHandler(stream=sys.stdout)]
+    if log_file:
+        if when:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(
+                log_file, when=when, backupCount=backup_count,
+                encoding='utf-8'
+            ))
+        else:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count,
+                encoding='utf-8'
+            ))
+    formatter = (JSONFormatter() if log_format == 'json'
+                 else logging.Formatter(TEXT_FORMAT))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging(log_file=None, level=LOG_LEVEL, **options):
+    """Неблокирующее логирование: запись в файл идёт в отдельном потоке.
+
+    Корневой логгер получает только DeferredQueueHandler, обработчики
+    make_handlers работают в QueueListener. LOG_FILE из окружения
+    заменяет log_file. Слушатель останавливается при выходе.
+    """
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *make_handlers(LOG_FILE or log_file, **options),
+        respect_handler_level=True
+    )
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+    30, 60
+)
+
+METRICS_SERVER_STARTED = 'Метрики доступны на http://{host}:{port}/metrics'
+
+logger = logging.getLogger(__name__)
+
+
+def format_labels(labelnames, labels):
+    """Метки в формате Prometheus: {name="value",...}."""
+    if not labelnames:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(labelnames, labels)
+    )
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Счётчик, который только растёт."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        """Увеличиваем счётчик для набора меток."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        """Строки (имя, метки, значение) для выгрузки."""
+        for labels, value in list(self.values.items()):
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и падать.
+
+    Если передана функция collect, значения считаются только в момент
+    выгрузки: она возвращает словарь {кортеж меток: значение}.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, value, *labels):
+        """Устанавливаем значение для набора меток."""
+        self.values[labels] = value
+
+    def samples(self):
+        """Строки (имя, метки, значение) для выгрузки."""
+        values = self.values if self.collect is None else self.collect()
+        for labels, value in list(values.items()):
+            yield self.name, labels, value
+
+
+class Histogram(Counter):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        """Добавляем наблюдение: одна корзина, сумма и количество."""
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels):
+        """Контекстный менеджер, замеряющий длительность блока."""
+        return Timer(self, labels)
+
+    def samples(self):
+        """Строки (имя, метки, значение) для выгрузки."""
+        for labels, series in list(self.values.items()):
+            cumulative = 0
+            bounds = self.buckets + (float('inf'),)
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                yield (self.name + '_bucket',
+                       labels + (format_bound(bound),), cumulative)
+            yield self.name + '_sum', labels, series[-1]
+            yield self.name + '_count', labels, cumulative
+
+
+def format_bound(bound):
+    """Граница корзины в формате Prometheus."""
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class Timer:
+    """Замер длительности блока для гистограммы."""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(
+            time.perf_counter() - self.started, *self.labels
+        )
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        """Регистрируем метрику; одноимённая заменяется."""
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            labelnames = metric.labelnames
+            if metric.kind == 'histogram':
+                labelnames += ('le',)
+            for name, labels, value in metric.samples():
+                names = labelnames if name.endswith('_bucket') else (
+                    metric.labelnames
+                )
+                lines.append(
+                    f'{name}{format_labels(names, labels)} {value}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'homework_stage_seconds', 'Длительность этапов опроса', ('stage',)
+))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total', 'Ошибки опроса по классу исключения', ('error',)
+))
+SCHEDULER_LAG = REGISTRY.register(Histogram(
+    'homework_scheduler_lag_seconds',
+    'На сколько позже назначенного времени начат опрос аккаунта'
+))
+UNCHANGED_RESPONSES = REGISTRY.register(Counter(
+    'homework_unchanged_responses_total',
+    'Ответы API, совпавшие с последним обработанным'
+))
+SAVED_CPU_SECONDS = REGISTRY.register(Counter(
+    'homework_saved_cpu_seconds_total',
+    'Процессорное время, не потраченное на неизменившиеся ответы'
+))
+NOTIFICATIONS = REGISTRY.register(Counter(
+    'homework_notifications_total', 'Сообщения о новых статусах'
+))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по адресу /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        """Ответ на GET /metrics."""
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Не засоряем лог запросами к метрикам."""
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Запускаем HTTP-сервер метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(METRICS_SERVER_STARTED.format(
+        host=host, port=server.server_address[1]
+    ))
+    return server
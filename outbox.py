@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+import telegram
+
+import homework
+from metrics import ERRORS, STAGE_SECONDS
+from resilience import backoff_delay
+
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 25))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+MAX_MESSAGE_LENGTH = 4096
+MESSAGES_SEPARATOR = '\n\n'
+
+TELEGRAM_FLOOD_CONTROL = ('Telegram просит подождать {retry_after} с, '
+                          'в очереди чатов: {chats}')
+TELEGRAM_RETRY = 'Повторим отправку через {delay:.1f} с: {telegram_error}'
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def refill(self):
+        """Добавляем токены за прошедшее время."""
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self):
+        """Сколько секунд ждать до появления токена."""
+        self.refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Забираем токен."""
+        self.refill()
+        self.tokens -= 1
+
+
+class Outbox:
+    """Очередь исходящих сообщений Телеграм с отдельным обработчиком.
+
+    Опрос только кладёт сообщения в очередь. Обработчик соблюдает общий
+    лимит и лимит на чат, склеивает накопившиеся сообщения одного чата
+    в одно и при RetryAfter ждёт столько, сколько попросил сервер.
+    """
+
+    def __init__(self, bot, run_blocking, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE, clock=time.monotonic):
+        self.bot = bot
+        self.run_blocking = run_blocking
+        self.chat_rate = chat_rate
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, clock=clock)
+        self.chat_buckets = {}
+        self.pending = {}
+        self.ready = deque()
+        self.resume_at = 0
+        self.failures = 0
+        self.wakeup = None
+
+    def __len__(self):
+        return sum(len(messages) for messages in self.pending.values())
+
+    def put(self, chat_id, message):
+        """Кладём сообщение в очередь, не дожидаясь отправки."""
+        messages = self.pending.setdefault(chat_id, deque())
+        if not messages:
+            self.ready.append(chat_id)
+        messages.append(message)
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def wait_time(self, chat_id):
+        """Сколько секунд ждать до отправки в чат."""
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, clock=self.clock
+            )
+        return max(
+            self.resume_at - self.clock(),
+            self.global_bucket.wait_time(),
+            self.chat_buckets[chat_id].wait_time()
+        )
+
+    def take_batch(self, chat_id):
+        """Склеиваем накопившиеся сообщения чата в пределах лимита длины."""
+        messages = self.pending[chat_id]
+        batch = [messages.popleft()]
+        length = len(batch[0])
+        while messages and (
+            length + len(MESSAGES_SEPARATOR) + len(messages[0])
+            <= MAX_MESSAGE_LENGTH
+        ):
+            length += len(MESSAGES_SEPARATOR) + len(messages[0])
+            batch.append(messages.popleft())
+        return batch
+
+    async def deliver(self, chat_id, text):
+        """Отправляем одно сообщение. False - нужно повторить позже."""
+        self.global_bucket.take()
+        self.chat_buckets[chat_id].take()
+        try:
+            with STAGE_SECONDS.time('send_message'):
+                await self.run_blocking(self.bot.send_message, chat_id, text)
+        except telegram.error.RetryAfter as error:
+            ERRORS.inc(type(error).__name__)
+            logger.warning(TELEGRAM_FLOOD_CONTROL.format(
+                retry_after=error.retry_after, chats=len(self.ready) + 1
+            ))
+            self.resume_at = self.clock() + error.retry_after
+            return False
+        except telegram.error.NetworkError as error:
+            if isinstance(error, telegram.error.BadRequest):
+                return self.drop(text, error)
+            ERRORS.inc(type(error).__name__)
+            delay = backoff_delay(self.failures, base=1, cap=60)
+            self.failures += 1
+            logger.warning(TELEGRAM_RETRY.format(
+                delay=delay, telegram_error=error
+            ))
+            self.resume_at = self.clock() + delay
+            return False
+        except telegram.TelegramError as error:
+            return self.drop(text, error)
+        self.failures = 0
+        logger.debug(homework.TELEGRAM_MESSAGE_SENT.format(message=text))
+        return True
+
+    def drop(self, text, error):
+        """Сообщение не отправить повтором - логируем и отбрасываем."""
+        ERRORS.inc(type(error).__name__)
+        logger.error(homework.TELEGRAM_MESSAGE_NOT_SENT.format(
+            message=text, telegram_error=error
+        ), exc_info=True)
+        return True
+
+    async def drain(self):
+        """Отправляем всё, что накопилось в очереди."""
+        while self.ready:
+            chat_id = self.ready.popleft()
+            if not self.pending.get(chat_id):
+                self.pending.pop(chat_id, None)
+                continue
+            delay = self.wait_time(chat_id)
+            if delay > 0:
+                self.ready.append(chat_id)
+                await asyncio.sleep(
+                    min(self.wait_time(chat) for chat in self.ready)
+                )
+                continue
+            batch = self.take_batch(chat_id)
+            if not await self.deliver(
+                chat_id, MESSAGES_SEPARATOR.join(batch)
+            ):
+                self.pending[chat_id].extendleft(reversed(batch))
+                self.ready.appendleft(chat_id)
+            elif self.pending[chat_id]:
+                self.ready.append(chat_id)
+            else:
+                del self.pending[chat_id]
+
+    async def run(self):
+        """Бесконечно отправляем сообщения по мере поступления."""
+        self.wakeup = asyncio.Event()
+        while True:
+            self.wakeup.clear()
+            await self.drain()
+            await self.wakeup.wait()
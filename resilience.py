@@ -0,0 +1,113 @@
+import email.utils
+import logging
+import os
+import random
+import time
+
+import homework
+
+FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 60))
+BACKOFF_BASE = float(os.getenv('BACKOFF_BASE', 30))
+BACKOFF_CAP = float(os.getenv('BACKOFF_CAP', 3600))
+ENDPOINT_FAILURE_CODES = (429, 500, 502, 503, 504)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+BREAKER_OPENED = ('Сервис {name} недоступен, запросы приостановлены '
+                  'на {timeout:.0f} с')
+BREAKER_CLOSED = 'Сервис {name} снова доступен'
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Автомат защиты для одного эндпоинта.
+
+    closed - запросы идут; после failure_threshold ошибок подряд
+    переходит в open и отклоняет запросы reset_timeout секунд (или сколько
+    попросил сервер в Retry-After). Затем half-open: пропускается один
+    пробный запрос, успех закрывает автомат, ошибка снова открывает.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened = False
+        self.retry_at = 0
+        self.probing = False
+
+    @property
+    def state(self):
+        """Текущее состояние автомата."""
+        if not self.opened:
+            return CLOSED
+        if self.clock() < self.retry_at:
+            return OPEN
+        return HALF_OPEN
+
+    def allow_request(self):
+        """Можно ли сейчас отправлять запрос."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self):
+        """Эндпоинт ответил - закрываем автомат."""
+        if self.opened:
+            logger.info(BREAKER_CLOSED.format(name=self.name))
+        self.failures = 0
+        self.opened = False
+        self.probing = False
+
+    def record_failure(self, retry_after=None):
+        """Эндпоинт не ответил - при необходимости открываем автомат."""
+        self.failures += 1
+        if (self.opened or self.failures >= self.failure_threshold
+                or retry_after is not None):
+            timeout = max(self.reset_timeout, retry_after or 0)
+            self.opened = True
+            self.probing = False
+            self.retry_at = self.clock() + timeout
+            logger.warning(BREAKER_OPENED.format(
+                name=self.name, timeout=timeout
+            ))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Экспоненциальная задержка с полным джиттером."""
+    return random.uniform(0, min(cap, base * 2 ** min(attempt, 32)))
+
+
+def parse_retry_after(value, now=None):
+    """Секунды из заголовка Retry-After: число или HTTP-дата."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(date.timestamp() - now, 0)
+
+
+def is_endpoint_failure(error):
+    """Ошибка говорит о сбое самого эндпоинта, а не аккаунта."""
+    if isinstance(error, ConnectionError):
+        return True
+    return (isinstance(error, homework.TheAnswerIsNot200Error)
+            and error.status_code in ENDPOINT_FAILURE_CODES)
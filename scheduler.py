@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import os
+import time
+import zlib
+
+import homework
+
+MIN_POLL_PERIOD = int(os.getenv('MIN_POLL_PERIOD', 120))
+MAX_POLL_PERIOD = int(os.getenv('MAX_POLL_PERIOD', 3600))
+REVIEWING_POLL_PERIOD = int(os.getenv('REVIEWING_POLL_PERIOD', 180))
+IDLE_AFTER = int(os.getenv('IDLE_AFTER', 24 * 60 * 60))
+NIGHT_HOURS = range(
+    int(os.getenv('NIGHT_START_HOUR', 1)), int(os.getenv('NIGHT_END_HOUR', 8))
+)
+NIGHT_FACTOR = float(os.getenv('NIGHT_FACTOR', 3))
+FIRST_POLL_SPREAD = float(os.getenv('FIRST_POLL_SPREAD', 60))
+
+BOUNDS_ERROR = ('Минимальный период опроса {min_period} больше '
+                'максимального {max_period}')
+
+
+class PollingPolicy:
+    """Период опроса аккаунта в зависимости от его активности.
+
+    Пока работа на ревью, опрашиваем часто. Без изменений дольше idle_after
+    период удваивается за каждый такой промежуток. Ночью период
+    умножается на night_factor. Результат всегда в [min_period, max_period].
+    """
+
+    def __init__(self, min_period=MIN_POLL_PERIOD, max_period=MAX_POLL_PERIOD,
+                 base_period=homework.RETRY_PERIOD,
+                 reviewing_period=REVIEWING_POLL_PERIOD,
+                 idle_after=IDLE_AFTER, night_hours=NIGHT_HOURS,
+                 night_factor=NIGHT_FACTOR):
+        if min_period > max_period:
+            raise ValueError(BOUNDS_ERROR.format(
+                min_period=min_period, max_period=max_period
+            ))
+        self.min_period = min_period
+        self.max_period = max_period
+        self.base_period = base_period
+        self.reviewing_period = reviewing_period
+        self.idle_after = idle_after
+        self.night_hours = night_hours
+        self.night_factor = night_factor
+
+    def interval(self, statuses, last_change, now=None):
+        """Через сколько секунд опрашивать аккаунт снова."""
+        now = time.time() if now is None else now
+        if any(entry[0] == 'reviewing' for entry in statuses.values()):
+            period = self.reviewing_period
+        else:
+            idle_periods = int((now - last_change) // self.idle_after)
+            period = self.base_period * 2 ** min(idle_periods, 16)
+        if time.localtime(now).tm_hour in self.night_hours:
+            period *= self.night_factor
+        return max(self.min_period, min(self.max_period, period))
+
+
+def first_poll_offset(name, spread=FIRST_POLL_SPREAD):
+    """Сдвиг первого опроса аккаунта в [0, spread).
+
+    Сдвиг зависит только от имени аккаунта, поэтому после перезапуска
+    аккаунты не собираются в одну секунду.
+    """
+    return zlib.crc32(name.encode()) / 2 ** 32 * spread
+
+
+def next_due(due, delay, now):
+    """Время следующего опроса с фиксированным шагом от назначенного.
+
+    Шаг отсчитывается от времени, на которое опрос был назначен, а не от
+    его окончания, поэтому длительность опроса не копится в задержке.
+    Опрос, досрочный или опоздавший больше чем на шаг, отсчитывается от
+    now.
+    """
+    return max(min(due, now) + delay, now)
+
+
+class PollQueue:
+    """Очередь опросов на куче по монотонному времени.
+
+    Постановка и извлечение - O(log n). Перенос опроса не ищет старую
+    запись в куче: она остаётся и пропускается при извлечении, а когда
+    таких записей становится больше живых, куча перестраивается.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def schedule(self, key, when):
+        """Назначаем (или переносим) опрос key на время when."""
+        entry = (when, next(self.counter), key)
+        self.entries[key] = entry
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = list(self.entries.values())
+            heapq.heapify(self.heap)
+
+    def remove(self, key):
+        """Снимаем опрос key с расписания."""
+        self.entries.pop(key, None)
+
+    def skip_stale(self):
+        """Убираем с вершины кучи перенесённые и снятые записи."""
+        while self.heap and self.entries.get(self.heap[0][2]) is not (
+            self.heap[0]
+        ):
+            heapq.heappop(self.heap)
+
+    def next_due(self):
+        """Время ближайшего опроса или None, если очередь пуста."""
+        self.skip_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now=None):
+        """Снимаем наступившие опросы: список пар (ключ, опоздание)."""
+        now = self.clock() if now is None else now
+        due = []
+        self.skip_stale()
+        while self.heap and self.heap[0][0] <= now:
+            when, _, key = heapq.heappop(self.heap)
+            del self.entries[key]
+            due.append((key, now - when))
+            self.skip_stale()
+        return due
@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from bisect import bisect
+from functools import partial
+
+from dotenv import load_dotenv
+
+from accounts import load_accounts
+from lifecycle import RELOAD_SIGNAL, SignalHandler
+from log_config import setup_logging
+from metrics import (METRICS_PORT, REGISTRY, Counter, Gauge,
+                     start_metrics_server)
+from resilience import backoff_delay
+
+SHARD_REPLICAS = int(os.getenv('SHARD_REPLICAS', 100))
+SHARD_START_METHOD = os.getenv('SHARD_START_METHOD', 'spawn')
+SUPERVISOR_PERIOD = float(os.getenv('SUPERVISOR_PERIOD', 1))
+WORKER_STABLE_AFTER = float(os.getenv('WORKER_STABLE_AFTER', 60))
+WORKER_STOP_TIMEOUT = float(os.getenv('WORKER_STOP_TIMEOUT', 40))
+
+WORKER_STARTED = 'Запущен процесс шарда {shard} из {shards}, pid {pid}'
+WORKER_EXITED = ('Процесс шарда {shard} завершился с кодом {code}, '
+                 'перезапуск через {delay:.1f} с')
+SHARDS_CHANGED = 'Число шардов изменено: {old} -> {new}'
+SHARDS_ERROR = 'Число шардов должно быть положительным, получено {shards}'
+
+SHARD_ACCOUNTS = REGISTRY.register(Gauge(
+    'homework_shard_accounts', 'Аккаунтов в шарде процесса', ('shard',)
+))
+WORKER_RESTARTS = REGISTRY.register(Counter(
+    'homework_worker_restarts_total', 'Перезапуски процессов шардов',
+    ('shard',)
+))
+
+logger = logging.getLogger(__name__)
+
+
+def shard_count():
+    """Число шардов из SHARDS, по умолчанию - число ядер."""
+    shards = int(os.getenv('SHARDS') or os.cpu_count() or 1)
+    if shards < 1:
+        raise ValueError(SHARDS_ERROR.format(shards=shards))
+    return shards
+
+
+def ring_hash(key):
+    """64-битный хеш строки для кольца."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Консистентное хеширование аккаунтов по шардам.
+
+    Каждый шард занимает replicas точек на кольце, аккаунт попадает в
+    шард ближайшей точки по часовой стрелке. При изменении числа шардов
+    с N на N + 1 переезжает примерно 1 / (N + 1) аккаунтов, и все - в
+    новый шард.
+    """
+
+    def __init__(self, shards, replicas=SHARD_REPLICAS):
+        points = sorted(
+            (ring_hash(f'{shard}:{replica}'), shard)
+            for shard in range(shards) for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.shards = [shard for _, shard in points]
+
+    def shard(self, key):
+        """Номер шарда для ключа."""
+        index = bisect(self.hashes, ring_hash(key)) % len(self.hashes)
+        return self.shards[index]
+
+
+def shard_accounts(shard, loader=load_accounts):
+    """Аккаунты шарда shard при текущем числе шардов."""
+    ring = HashRing(shard_count())
+    accounts = [
+        account for account in loader() if ring.shard(account.name) == shard
+    ]
+    SHARD_ACCOUNTS.set(len(accounts), str(shard))
+    return accounts
+
+
+def run_worker(shard):
+    """Процесс шарда: движок опроса только для своих аккаунтов.
+
+    Метрики шарда - на порту METRICS_PORT + 1 + shard. Команды бота в
+    шардах не принимаются: getUpdates у одного бота может вызывать
+    только один процесс.
+    """
+    import engine
+    setup_logging()
+    engine.main(
+        account_loader=partial(shard_accounts, shard),
+        metrics_port=METRICS_PORT and METRICS_PORT + 1 + shard,
+        commands=False, lease_name=f'{engine.ENGINE_LEASE_NAME}-{shard}'
+    )
+
+
+class Supervisor:
+    """Запускает процессы шардов и следит за ними.
+
+    Упавший процесс перезапускается с экспоненциальной задержкой; если
+    он проработал дольше stable_after, счётчик сбоев сбрасывается. По
+    SIGHUP число шардов перечитывается: лишние процессы
+    останавливаются, новые запускаются, а оставшиеся получают SIGHUP и
+    сами перечитывают свои аккаунты.
+    """
+
+    def __init__(self, shards=None, target=run_worker,
+                 start_method=SHARD_START_METHOD, period=SUPERVISOR_PERIOD,
+                 stable_after=WORKER_STABLE_AFTER,
+                 stop_timeout=WORKER_STOP_TIMEOUT, clock=time.monotonic):
+        self.shards = shard_count() if shards is None else shards
+        self.target = target
+        self.context = multiprocessing.get_context(start_method)
+        self.period = period
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.clock = clock
+        self.workers = {}
+        self.started = {}
+        self.failures = {}
+        self.restart_at = {}
+        REGISTRY.register(Gauge(
+            'homework_workers_alive', 'Работающие процессы шардов',
+            ('shard',), collect=lambda: {
+                (str(shard),): int(process.is_alive())
+                for shard, process in list(self.workers.items())
+            }
+        ))
+
+    def start_worker(self, shard):
+        """Запускаем процесс шарда."""
+        process = self.context.Process(
+            target=self.target, args=(shard,), name=f'homework-shard-{shard}'
+        )
+        process.start()
+        self.workers[shard] = process
+        self.started[shard] = self.clock()
+        logger.info(WORKER_STARTED.format(
+            shard=shard, shards=self.shards, pid=process.pid
+        ))
+
+    def stop_worker(self, shard):
+        """Останавливаем процесс шарда: SIGTERM, затем SIGKILL."""
+        process = self.workers.pop(shard)
+        process.terminate()
+        process.join(self.stop_timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def resize(self, shards):
+        """Меняем число шардов, не трогая процессы без изменений."""
+        if shards != self.shards:
+            logger.info(SHARDS_CHANGED.format(old=self.shards, new=shards))
+        self.shards = shards
+        for shard in sorted(self.workers):
+            if shard >= shards:
+                self.stop_worker(shard)
+            elif RELOAD_SIGNAL and self.workers[shard].is_alive():
+                os.kill(self.workers[shard].pid, RELOAD_SIGNAL)
+        for shard in list(self.restart_at):
+            if shard >= shards:
+                del self.restart_at[shard]
+        self.check()
+
+    def reload(self):
+        """Перечитываем .env и число шардов (SIGHUP)."""
+        load_dotenv(override=True)
+        try:
+            shards = shard_count()
+        except ValueError as error:
+            logger.error(error)
+            return
+        self.resize(shards)
+
+    def check(self):
+        """Перезапускаем упавшие процессы и запускаем недостающие."""
+        now = self.clock()
+        for shard, process in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            del self.workers[shard]
+            if now - self.started[shard] >= self.stable_after:
+                self.failures[shard] = 0
+            self.failures[shard] = self.failures.get(shard, 0) + 1
+            delay = backoff_delay(self.failures[shard] - 1, base=1, cap=60)
+            self.restart_at[shard] = now + delay
+            WORKER_RESTARTS.inc(str(shard))
+            logger.error(WORKER_EXITED.format(
+                shard=shard, code=process.exitcode, delay=delay
+            ))
+        for shard in range(self.shards):
+            if shard not in self.workers and (
+                self.restart_at.get(shard, now) <= now
+            ):
+                self.restart_at.pop(shard, None)
+                self.start_worker(shard)
+
+    def stop(self):
+        """Останавливаем все процессы шардов."""
+        for shard in list(self.workers):
+            self.workers[shard].terminate()
+        for shard in list(self.workers):
+            self.stop_worker(shard)
+
+    def run(self):
+        """Следим за процессами до SIGTERM или SIGINT."""
+        signals = SignalHandler().install()
+        try:
+            self.check()
+            while not signals.stopping:
+                if signals.take_reload():
+                    self.reload()
+                self.check()
+                with signals.interruptible():
+                    if not signals.pending:
+                        time.sleep(self.period)
+        finally:
+            signals.restore()
+            self.stop()
+
+
+def main():
+    """Запуск процессов шардов под присмотром."""
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    Supervisor().run()
+
+
+if __name__ == '__main__':
+    setup_logging()
+    main()
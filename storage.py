@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'sqlite')
+STATE_DB = os.getenv('STATE_DB', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'homework_state.sqlite3'
+))
+STATE_FLUSH_PERIOD = float(os.getenv('STATE_FLUSH_PERIOD', 30))
+
+UNKNOWN_BACKEND_ERROR = 'Неизвестное хранилище состояния: {backend}'
+STATE_FLUSHED = 'Сохранено состояние аккаунтов: {count}'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS account_state (
+    account TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    statuses TEXT NOT NULL,
+    last_error TEXT NOT NULL
+)
+'''
+SELECT_STATE = ('SELECT timestamp, statuses, last_error '
+                'FROM account_state WHERE account = ?')
+UPSERT_STATE = ('INSERT OR REPLACE INTO account_state '
+                '(account, timestamp, statuses, last_error) '
+                'VALUES (?, ?, ?, ?)')
+
+AccountRecord = namedtuple(
+    'AccountRecord', ('timestamp', 'statuses', 'last_error')
+)
+EMPTY_RECORD = AccountRecord(0, {}, '')
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStateStore:
+    """Хранилище состояния аккаунтов в памяти.
+
+    save только запоминает запись, а наследники пишут изменения на диск
+    пачкой в flush, не чаще раза в flush_period секунд.
+    """
+
+    def __init__(self, flush_period=STATE_FLUSH_PERIOD):
+        self.flush_period = flush_period
+        self.records = {}
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def load(self, account):
+        """Последнее сохранённое состояние аккаунта."""
+        record = (self.pending.get(account) or self.records.get(account)
+                  or self.read(account) or EMPTY_RECORD)
+        return record._replace(statuses=dict(record.statuses))
+
+    def read(self, account):
+        """Чтение состояния из постоянного хранилища."""
+        return None
+
+    def forget(self, account):
+        """Сбрасываем изменения перед чтением, которое их не видело."""
+        self.flush()
+
+    def save(self, account, timestamp, statuses, last_error):
+        """Откладываем запись, если состояние изменилось."""
+        record = AccountRecord(timestamp, dict(statuses), last_error)
+        if record != self.load(account):
+            self.pending[account] = record
+
+    def maybe_flush(self):
+        """Сбрасываем накопленные записи, если прошёл flush_period."""
+        if time.monotonic() - self.last_flush >= self.flush_period:
+            self.flush()
+
+    def flush(self):
+        """Записываем все накопленные изменения одной транзакцией."""
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        self.write(pending)
+        self.records.update(pending)
+        logger.debug(STATE_FLUSHED.format(count=len(pending)))
+
+    def write(self, records):
+        """Запись пачки состояний в постоянное хранилище."""
+
+    def close(self):
+        """Сбрасываем изменения перед остановкой."""
+        self.flush()
+
+
+class SQLiteStateStore(MemoryStateStore):
+    """Хранилище состояния аккаунтов в файле SQLite."""
+
+    def __init__(self, path=STATE_DB, flush_period=STATE_FLUSH_PERIOD):
+        super().__init__(flush_period)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(SCHEMA)
+
+    def read(self, account):
+        """Чтение состояния аккаунта из базы."""
+        row = self.connection.execute(SELECT_STATE, (account,)).fetchone()
+        if row is None:
+            return None
+        timestamp, statuses, last_error = row
+        record = AccountRecord(timestamp, json.loads(statuses), last_error)
+        self.records[account] = record
+        return record
+
+    def forget(self, account):
+        """Забываем запись аккаунта в памяти: load прочитает её из базы.
+
+        Нужно, когда опрос вёл другой экземпляр бота.
+        """
+        super().forget(account)
+        self.records.pop(account, None)
+
+    def write(self, records):
+        """Запись пачки состояний одной транзакцией."""
+        with self.connection:
+            self.connection.executemany(UPSERT_STATE, [
+                (account, record.timestamp,
+                 json.dumps(record.statuses, ensure_ascii=False),
+                 record.last_error)
+                for account, record in records.items()
+            ])
+
+    def close(self):
+        """Сбрасываем изменения и закрываем базу."""
+        super().close()
+        self.connection.close()
+
+
+def open_state_store(backend=None):
+    """Создаём хранилище состояния по имени бэкенда."""
+    backend = STATE_BACKEND if backend is None else backend
+    if backend == 'sqlite':
+        return SQLiteStateStore()
+    if backend == 'memory':
+        return MemoryStateStore()
+    raise ValueError(UNKNOWN_BACKEND_ERROR.format(backend=backend))
@@ -0,0 +1,171 @@
+import codecs
+import json
+import os
+import re
+
+import homework
+
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+UNEXPECTED_CHARACTER = 'Ожидался один из символов {expected}'
+EXTRA_DATA = 'Лишние данные после ответа'
+KEY_NOT_STRING = 'Ключ объекта должен быть строкой'
+
+
+class ResponseStream:
+    """Потоковый разбор объекта JSON верхнего уровня.
+
+    Элементы массива list_key отдаются по одному при итерации, остальные
+    ключи собираются в fields и доступны через get после её окончания.
+    В памяти держится только текущий элемент и недочитанный кусок
+    ответа, а не весь ответ целиком.
+    """
+
+    def __init__(self, chunks, list_key, encoding='utf-8', response=None,
+                 parameters=None):
+        self.chunks = iter(chunks)
+        self.list_key = list_key
+        self.text = codecs.getincrementaldecoder(encoding)()
+        self.decoder = json.JSONDecoder()
+        self.response = response
+        self.parameters = {} if parameters is None else parameters
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.fields = {}
+        self.found = False
+        self.count = 0
+
+    def get(self, key, default=None):
+        """Значение ключа верхнего уровня, кроме list_key."""
+        return self.fields.get(key, default)
+
+    def fill(self):
+        """Дочитываем следующий кусок ответа. False - ответ закончился."""
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buffer += self.text.decode(b'', final=True)
+            return False
+        self.buffer += self.text.decode(chunk)
+        return True
+
+    def next_char(self):
+        """Первый значимый символ после пробелов, '' - конец ответа."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def error(self, message):
+        """Ошибка разбора в том же виде, что и у response.json()."""
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def expect(self, expected):
+        """Пропускаем один из символов expected и возвращаем его."""
+        char = self.next_char()
+        if not char or char not in expected:
+            raise self.error(UNEXPECTED_CHARACTER.format(expected=expected))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Разбираем очередное значение JSON целиком.
+
+        Значение, закончившееся ровно на конце прочитанного, может быть
+        обрезано (например, число), поэтому сначала дочитываем ответ.
+        """
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Элементы массива, начало которого уже пропущено."""
+        if self.next_char() == ']':
+            self.pos += 1
+            return
+        while True:
+            self.count += 1
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        if self.next_char() != '{':
+            value = self.value()
+            raise TypeError(homework.API_DICT_ERROR.format(
+                data_type=type(value)
+            ))
+        self.pos += 1
+        closed = self.next_char() == '}'
+        if closed:
+            self.pos += 1
+        while not closed:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self.error(KEY_NOT_STRING)
+            self.expect(':')
+            if key == self.list_key and self.next_char() == '[':
+                self.pos += 1
+                self.found = True
+                yield from self.items()
+            else:
+                self.fields[key] = self.value()
+            closed = self.expect(',}') == '}'
+        if self.next_char():
+            raise self.error(EXTRA_DATA)
+
+    def close(self):
+        """Возвращаем соединение в пул."""
+        if self.response is not None:
+            self.response.close()
+
+
+def request_api_stream(headers, timestamp, session=None,
+                       timeout=homework.API_TIMEOUT,
+                       chunk_size=STREAM_CHUNK_SIZE):
+    """Потоковый запрос к API YP: тело ответа читается по мере разбора."""
+    response, parameters = homework.send_api_request(
+        headers, timestamp, session, timeout, stream=True
+    )
+    return ResponseStream(
+        response.iter_content(chunk_size),
+        homework.RESPONSE_SCHEMA['list_key'],
+        response.encoding or 'utf-8', response, parameters
+    )
+
+
+def check_stream(stream):
+    """Проверяем работы по одной, по мере разбора ответа.
+
+    Ошибки ответа в целом (ключи code и error, нет списка работ)
+    выясняются только после разбора всего ответа.
+    """
+    try:
+        yield from map(homework.validate_homework, stream)
+    finally:
+        stream.close()
+    homework.check_api_error(stream.fields, stream.parameters)
+    list_key = stream.list_key
+    if list_key in stream.fields:
+        raise TypeError(homework.API_LIST_ERROR.format(
+            data_type=type(stream.fields[list_key])
+        ))
+    if not stream.found:
+        raise KeyError(homework.NO_KEY_ERROR.format(key=list_key))
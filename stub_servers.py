@@ -0,0 +1,262 @@
+"""Локальные заглушки API Практикума и Telegram Bot API для нагрузочных тестов.
+
+Запуск:
+    python stub_servers.py --latency lognormal:0.05:0.5 --error-500 0.01
+
+После этого бот направляется на заглушки переменными окружения
+PRACTICUM_ENDPOINT=http://127.0.0.1:8001/api/user_api/homework_statuses/
+и TELEGRAM_API_URL=http://127.0.0.1:8002/bot.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOMEWORK_STATUSES = ('reviewing', 'approved', 'rejected')
+PRACTICUM_PATH = '/api/user_api/homework_statuses/'
+LATENCY_SPEC_ERROR = ('Задержка задаётся как fixed:<с>, uniform:<от>:<до> '
+                      'или lognormal:<медиана>:<sigma>, получено {spec}')
+STUBS_STARTED = ('Заглушка Практикума: http://{host}:{practicum_port}{path}\n'
+                 'Заглушка Telegram: http://{host}:{telegram_port}/bot')
+
+
+def parse_latency(spec, rng=random):
+    """Функция, возвращающая задержку ответа по описанию распределения."""
+    kind, *values = spec.split(':')
+    try:
+        values = [float(value) for value in values]
+        if kind == 'fixed':
+            (delay,) = values
+            return lambda: delay
+        if kind == 'uniform':
+            low, high = values
+            return lambda: rng.uniform(low, high)
+        if kind == 'lognormal':
+            median, sigma = values
+            return lambda: rng.lognormvariate(math.log(median), sigma)
+    except ValueError:
+        pass
+    raise ValueError(LATENCY_SPEC_ERROR.format(spec=spec))
+
+
+class StubConfig:
+    """Поведение заглушки.
+
+    latency - функция задержки ответа в секундах; error_500, error_401,
+    malformed - доли ответов с ошибкой 500, с 401 и ключом code, с
+    битым JSON; homeworks - сколько работ в ответе; rate_limit - сколько
+    запросов в секунду обслуживать, остальным отвечать 429.
+    """
+
+    def __init__(self, latency=None, error_500=0, error_401=0, malformed=0,
+                 homeworks=1, rate_limit=0, seed=None):
+        self.latency = latency or (lambda: 0)
+        self.error_500 = error_500
+        self.error_401 = error_401
+        self.malformed = malformed
+        self.homeworks = homeworks
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.served = deque()
+        self.requests = 0
+
+    def rate_limited(self):
+        """Превышен ли лимит запросов за последнюю секунду."""
+        with self.lock:
+            self.requests += 1
+            if not self.rate_limit:
+                return False
+            now = time.monotonic()
+            while self.served and self.served[0] <= now - 1:
+                self.served.popleft()
+            if len(self.served) >= self.rate_limit:
+                return True
+            self.served.append(now)
+            return False
+
+    def choose_error(self):
+        """Случайно выбираем ошибку по заданным долям или None."""
+        with self.lock:
+            roll = self.random.random()
+        for error, rate in (('500', self.error_500), ('401', self.error_401),
+                            ('malformed', self.malformed)):
+            if roll < rate:
+                return error
+            roll -= rate
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая часть заглушек: задержка, ошибки и ответ JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    config = StubConfig()
+
+    def send_json(self, status, data, headers=None):
+        """Отправляем ответ JSON."""
+        body = data if isinstance(data, bytes) else json.dumps(
+            data, ensure_ascii=False
+        ).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def prepare(self):
+        """Задержка и выбор ошибки. Возвращает ошибку или None."""
+        if self.config.rate_limited():
+            return '429'
+        time.sleep(self.config.latency())
+        return self.config.choose_error()
+
+    def log_message(self, *args):
+        """Не пишем в stderr каждый запрос."""
+
+
+class PracticumStubHandler(StubHandler):
+    """Заглушка эндпоинта homework_statuses."""
+
+    def do_GET(self):
+        """Ответ на запрос статусов работ."""
+        url = urlparse(self.path)
+        if url.path != PRACTICUM_PATH:
+            self.send_json(404, {'detail': 'Not found'})
+            return
+        error = self.prepare()
+        if error == '429':
+            self.send_json(429, {'detail': 'Too many requests'},
+                           {'Retry-After': '1'})
+        elif error == '500':
+            self.send_json(500, {})
+        elif error == '401' or not self.headers.get(
+            'Authorization', ''
+        ).startswith('OAuth '):
+            self.send_json(401, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+                'source': '__response__'
+            })
+        elif error == 'malformed':
+            self.send_json(200, b'{"homeworks": [')
+        else:
+            from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+            self.send_json(200, self.homeworks(from_date))
+
+    def homeworks(self, from_date):
+        """Ответ API с config.homeworks работами."""
+        now = int(time.time())
+        with self.config.lock:
+            statuses = [
+                self.config.random.choice(HOMEWORK_STATUSES)
+                for _ in range(self.config.homeworks)
+            ]
+        return {
+            'homeworks': [{
+                'id': number,
+                'status': status,
+                'homework_name': f'student__hw{number:02}.zip',
+                'reviewer_comment': 'Всё нравится',
+                'date_updated': time.strftime(
+                    '%Y-%m-%dT%H:%M:%SZ', time.gmtime(max(from_date, now))
+                ),
+                'lesson_name': f'Спринт {number}'
+            } for number, status in enumerate(statuses, start=1)],
+            'current_date': now
+        }
+
+
+class TelegramStubHandler(StubHandler):
+    """Заглушка Telegram Bot API: sendMessage."""
+
+    def do_POST(self):
+        """Ответ на вызов метода Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/sendMessage'):
+            self.send_json(404, {'ok': False, 'error_code': 404,
+                                 'description': 'Not Found'})
+            return
+        error = self.prepare()
+        if error == '429':
+            self.send_json(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1}
+            })
+        elif error in ('500', 'malformed'):
+            self.send_json(500, {'ok': False, 'error_code': 500,
+                                 'description': 'Internal Server Error'})
+        elif error == '401':
+            self.send_json(401, {'ok': False, 'error_code': 401,
+                                 'description': 'Unauthorized'})
+        else:
+            self.send_json(200, {'ok': True, 'result': {
+                'message_id': self.config.requests,
+                'chat': {'id': data.get('chat_id')},
+                'date': int(time.time()),
+                'text': data.get('text')
+            }})
+
+
+def start_stub(handler, config, port=0, host='127.0.0.1'):
+    """Запускаем заглушку в фоновом потоке и возвращаем сервер."""
+    handler = type(handler.__name__, (handler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args(args=None):
+    """Аргументы командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--practicum-port', type=int, default=8001)
+    parser.add_argument('--telegram-port', type=int, default=8002)
+    parser.add_argument('--latency', default='fixed:0')
+    parser.add_argument('--error-500', type=float, default=0)
+    parser.add_argument('--error-401', type=float, default=0)
+    parser.add_argument('--malformed', type=float, default=0)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--rate-limit', type=int, default=0)
+    parser.add_argument('--telegram-rate-limit', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Запуск обеих заглушек до Ctrl+C."""
+    args = parse_args(args)
+    practicum = start_stub(PracticumStubHandler, StubConfig(
+        parse_latency(args.latency), args.error_500, args.error_401,
+        args.malformed, args.homeworks, args.rate_limit, args.seed
+    ), args.practicum_port, args.host)
+    telegram_stub = start_stub(TelegramStubHandler, StubConfig(
+        parse_latency(args.latency), rate_limit=args.telegram_rate_limit,
+        seed=args.seed
+    ), args.telegram_port, args.host)
+    print(STUBS_STARTED.format(
+        host=args.host, path=PRACTICUM_PATH,
+        practicum_port=practicum.server_address[1],
+        telegram_port=telegram_stub.server_address[1]
+    ))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        practicum.shutdown()
+        telegram_stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
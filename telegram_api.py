@@ -0,0 +1,74 @@
+import os
+
+import requests
+import telegram
+
+TELEGRAM_API_URL = os.getenv(
+    'TELEGRAM_API_URL', 'https://api.telegram.org/bot'
+)
+TELEGRAM_READ_MARGIN = 10
+
+TELEGRAM_API_ERROR = 'Ошибка Telegram API {error_code}: {description}'
+TELEGRAM_NETWORK_ERROR = 'Ошибка соединения с Telegram API: {error}'
+
+
+class TelegramClient:
+    """Отправка сообщений через Bot API по общей HTTP-сессии.
+
+    Повторяет метод send_message у telegram.Bot и выбрасывает те же
+    исключения telegram.error, поэтому подходит для send_chat_message.
+    """
+
+    def __init__(self, token, session, base_url=TELEGRAM_API_URL):
+        self.session = session
+        self.base_url = base_url
+        self.set_token(token)
+
+    def set_token(self, token):
+        """Меняем токен бота, не закрывая соединения сессии."""
+        self.url = f'{self.base_url}{token}/'
+
+    def call(self, method, request_timeout=None, **data):
+        """Вызов метода Bot API.
+
+        request_timeout - таймаут HTTP-запроса в секундах, None - без него.
+        """
+        try:
+            response = self.session.post(
+                self.url + method, json=data, timeout=request_timeout
+            )
+            answer = response.json()
+        except (requests.RequestException, ValueError) as error:
+            raise telegram.error.NetworkError(
+                TELEGRAM_NETWORK_ERROR.format(error=error)
+            )
+        if answer.get('ok'):
+            return answer.get('result')
+        raise api_error(answer)
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Отправка сообщения в чат."""
+        return self.call('sendMessage', chat_id=chat_id, text=text, **kwargs)
+
+    def get_updates(self, offset=None, timeout=0):
+        """Новые сообщения боту; timeout - секунды long polling."""
+        return self.call(
+            'getUpdates', request_timeout=timeout + TELEGRAM_READ_MARGIN,
+            offset=offset, timeout=timeout, allowed_updates=['message']
+        )
+
+
+def api_error(answer):
+    """Исключение telegram.error, соответствующее ответу Bot API."""
+    error_code = answer.get('error_code')
+    parameters = answer.get('parameters') or {}
+    if 'retry_after' in parameters:
+        return telegram.error.RetryAfter(parameters['retry_after'])
+    message = TELEGRAM_API_ERROR.format(
+        error_code=error_code, description=answer.get('description')
+    )
+    if error_code == 401:
+        return telegram.error.Unauthorized(message)
+    if error_code == 400:
+        return telegram.error.BadRequest(message)
+    return telegram.TelegramError(message)
@@ -2,6 +2,13 @@ import sys
 import os
 
 
+# состояние бота между тестами не сохраняется на диск
+os.environ.setdefault('STATE_BACKEND', 'memory')
+# и не берёт аренду опроса
+os.environ.setdefault('LEASE_BACKEND', 'none')
+# и не пишет историю статусов
+os.environ.setdefault('HISTORY_FILE', '')
+
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
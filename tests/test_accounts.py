@@ -0,0 +1,72 @@
+import json
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def accounts_module():
+    import accounts
+    return accounts
+
+
+class TestAccounts:
+    ACCOUNTS = [
+        {'name': 'alice', 'practicum_token': 'token-a', 'chat_id': 1},
+        {'name': 'bob', 'practicum_token': 'token-b', 'chat_id': 2},
+    ]
+
+    def test_load_json_accounts(self, tmp_path, accounts_module):
+        path = tmp_path / 'accounts.json'
+        path.write_text(json.dumps(self.ACCOUNTS))
+        loaded = accounts_module.load_accounts(str(path))
+        assert [account.name for account in loaded] == ['alice', 'bob']
+        assert loaded[0].chat_id == '1', (
+            'Идентификатор чата должен приводиться к строке.'
+        )
+
+    def test_load_sqlite_accounts(self, tmp_path, accounts_module):
+        path = str(tmp_path / 'accounts.sqlite3')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE accounts (name, practicum_token, chat_id)'
+        )
+        connection.executemany(
+            'INSERT INTO accounts VALUES (:name, :practicum_token, :chat_id)',
+            self.ACCOUNTS
+        )
+        connection.commit()
+        connection.close()
+        loaded = accounts_module.load_accounts(path)
+        assert loaded[1] == accounts_module.Account('bob', 'token-b', '2')
+
+    def test_load_env_account(self, accounts_module, homework_module):
+        homework_module.PRACTICUM_TOKEN = 'sometoken'
+        homework_module.TELEGRAM_TOKEN = '1234:abcdefg'
+        homework_module.TELEGRAM_CHAT_ID = '12345'
+        loaded = accounts_module.load_accounts('')
+        assert loaded == [
+            accounts_module.Account('default', 'sometoken', '12345')
+        ]
+
+    def test_invalid_accounts(self, tmp_path, accounts_module):
+        path = tmp_path / 'accounts.json'
+        for data in ([], [{'name': 'alice'}], self.ACCOUNTS * 2):
+            path.write_text(json.dumps(data))
+            with pytest.raises(ValueError):
+                accounts_module.AccountTable(
+                    accounts_module.load_accounts(str(path))
+                )
+
+    def test_account_state(self, accounts_module):
+        table = accounts_module.AccountTable([
+            accounts_module.Account('alice', 'token-a', '1')
+        ])
+        state = table['alice']
+        assert len(table) == 1 and list(table) == [state]
+        assert (state.timestamp, state.last_error, state.statuses) == (
+            0, '', {}
+        )
+        assert state.headers == {'Authorization': 'OAuth token-a'}
+        with pytest.raises(AttributeError):
+            state.unknown = 1
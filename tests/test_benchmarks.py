@@ -0,0 +1,34 @@
+class TestBenchmarks:
+
+    def test_compare_detects_regressions(self):
+        from benchmarks import bench_pipeline
+        baseline = {
+            'parse': {'value': 1.0, 'unit': 's', 'better': 'lower'},
+            'throughput': {'value': 100, 'unit': '1/s', 'better': 'higher'},
+        }
+        same = bench_pipeline.compare(baseline, baseline, threshold=0.1)
+        assert same == []
+        worse = {
+            'parse': dict(baseline['parse'], value=1.2),
+            'throughput': dict(baseline['throughput'], value=80),
+            'new_metric': {'value': 1, 'unit': 's', 'better': 'lower'},
+        }
+        regressions = bench_pipeline.compare(worse, baseline, threshold=0.1)
+        assert len(regressions) == 2, (
+            'Ухудшение больше порога должно считаться регрессией.'
+        )
+
+    def test_micro_benchmarks_run(self):
+        from benchmarks import bench_pipeline
+        results = bench_pipeline.micro_benchmarks(sizes=(10,))
+        assert set(results) == {'check_response[10]', 'collect_updates[10]'}
+        assert all(result['value'] > 0 for result in results.values())
+
+    def test_import_report_parsing(self):
+        from benchmarks import import_time
+        rows = import_time.parse_importtime(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       100 |        100 |   json\n'
+            'import time:       400 |        500 | homework\n'
+        )
+        assert rows == [('json', 100, 100), ('homework', 400, 500)]
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+import requests
+import telegram
+
+import utils
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestColdStart:
+
+    def test_heavy_modules_are_lazy(self):
+        code = ('import sys, homework; '
+                'print(any(name in sys.modules '
+                'for name in ("telegram.bot", "requests.sessions")))')
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT_DIR, check=True,
+            capture_output=True, text=True
+        )
+        assert result.stdout.strip() == 'False', (
+            'telegram и requests не должны загружаться при импорте homework.'
+        )
+
+    def test_once_without_changes_does_not_create_bot(self, monkeypatch,
+                                                      homework_module):
+        def no_bot(*args, **kwargs):
+            raise AssertionError('Бот создан без сообщений для отправки.')
+
+        monkeypatch.setattr(telegram, 'Bot', no_bot)
+        monkeypatch.setattr(requests, 'get', utils.mock_get_with_data(
+            {'homeworks': [], 'current_date': 1000198000}
+        ))
+        homework_module.once()
+
+    def test_once_sends_and_saves(self, monkeypatch, homework_module):
+        bot = utils.MockTelegramBot()
+        monkeypatch.setattr(telegram, 'Bot', lambda **kwargs: bot)
+        data = {'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': 1000198000}
+        monkeypatch.setattr(requests, 'get', utils.mock_get_with_data(data))
+        store = homework_module.open_state_store()
+        monkeypatch.setattr(homework_module, 'open_state_store',
+                            lambda: store)
+        homework_module.once()
+        assert bot.is_message_sent
+        timestamp, statuses, _ = store.load(homework_module.DEFAULT_ACCOUNT)
+        assert timestamp == data['current_date'], (
+            'После цикла once метка времени должна сохраниться.'
+        )
+        assert statuses == {'hw1': ['approved', None]}
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+import requests
+
+import utils
+from utils import make_table, mock_get_with_data, poll_and_send
+
+
+@pytest.fixture
+def commands_module():
+    import commands
+    return commands
+
+
+class FakeClient:
+    def __init__(self, updates):
+        self.updates = updates
+        self.offsets = []
+
+    def get_updates(self, offset=None, timeout=0):
+        self.offsets.append(offset)
+        updates, self.updates = self.updates, []
+        return updates
+
+
+def command(text, chat_id='0', update_id=1):
+    return {'update_id': update_id,
+            'message': {'text': text, 'chat': {'id': int(chat_id)}}}
+
+
+class TestCommands:
+    DATA = {
+        'homeworks': [{'id': 7, 'homework_name': 'hw7', 'status': 'approved'}],
+        'current_date': 1000198000
+    }
+
+    @pytest.fixture
+    def polling(self, monkeypatch):
+        import engine
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(self.DATA))
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), make_table(2), concurrency=2
+        )
+        yield polling
+        polling.close()
+
+    def answers(self, polling, chat_id='0'):
+        return list(polling.outbox.pending.get(chat_id, []))
+
+    def test_status_and_history_from_cache(self, monkeypatch, polling,
+                                           commands_module, homework_module):
+        poll_and_send(polling)
+        calls = []
+        monkeypatch.setattr(requests, 'get',
+                            lambda *args, **kwargs: calls.append(args))
+        client = FakeClient([command('/status'),
+                             command('/history@bot', update_id=2)])
+        handler = commands_module.CommandHandler(polling, client)
+        asyncio.run(handler.poll_updates())
+        status, history = self.answers(polling)
+        verdict = homework_module.HOMEWORK_VERDICTS['approved']
+        assert status == f'hw7: {verdict}'
+        assert history.endswith(f'hw7: {verdict}')
+        assert calls == [], 'Команды не должны обращаться к API Практикума.'
+        assert handler.offset == 3
+        assert self.answers(polling, '1') == []
+
+    def test_refresh_is_rate_limited(self, polling, commands_module):
+        handler = commands_module.CommandHandler(
+            polling, FakeClient([]), refresh_period=300
+        )
+        state = polling.table['student1']
+        state.next_poll = float('inf')
+        chats = handler.states_by_chat()
+        handler.handle(command('/refresh', '1'), chats)
+        handler.handle(command('/refresh', '1'), chats)
+        started, refused = self.answers(polling, '1')
+        assert started == commands_module.REFRESH_STARTED
+        assert refused.startswith('Обновлять статусы можно')
+        assert state.next_poll != float('inf'), (
+            '/refresh должен назначать внеочередной опрос аккаунта.'
+        )
+
+    def test_unknown_command_and_chat(self, polling, commands_module):
+        handler = commands_module.CommandHandler(polling, FakeClient([]))
+        chats = handler.states_by_chat()
+        handler.handle(command('/start'), chats)
+        handler.handle(command('/status', chat_id='42'), chats)
+        handler.handle(command('привет'), chats)
+        assert self.answers(polling) == [commands_module.COMMANDS_HELP]
+        assert '42' not in polling.outbox.pending
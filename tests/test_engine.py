@@ -0,0 +1,341 @@
+import asyncio
+import time
+
+import requests
+
+import utils
+from utils import make_table, mock_get_with_data, poll_and_send
+
+
+class TestPollingEngine:
+    DATA = {
+        'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+        'current_date': 1000198000
+    }
+
+    def test_poll_sends_status(self, monkeypatch, homework_module):
+        import engine
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(self.DATA))
+        bot = utils.MockTelegramBot()
+        table = make_table()
+        polling = engine.PollingEngine(bot, table, concurrency=2)
+        state = table['student0']
+        try:
+            poll_and_send(polling, state)
+        finally:
+            polling.close()
+        assert state.timestamp == self.DATA['current_date'], (
+            'После отправки статуса должна обновиться метка времени.'
+        )
+        assert state.last_error == ''
+        assert bot.chat_id == '0', (
+            'Сообщение должно уйти в чат аккаунта.'
+        )
+        assert homework_module.HOMEWORK_VERDICTS['approved'] in bot.text
+
+    def test_poll_uses_account_token(self, monkeypatch):
+        import engine
+        tokens = []
+
+        def check_headers(*args, headers=None, **kwargs):
+            tokens.append(headers['Authorization'])
+            return mock_get_with_data(self.DATA)(*args, **kwargs)
+
+        monkeypatch.setattr(requests, 'get', check_headers)
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), make_table(3), concurrency=3
+        )
+        try:
+            asyncio.run(polling.poll_all())
+        finally:
+            polling.close()
+        assert sorted(tokens) == [f'OAuth token{i}' for i in range(3)], (
+            'Каждый аккаунт должен опрашиваться со своим токеном.'
+        )
+
+    def test_poll_reports_error_once(self, monkeypatch):
+        import engine
+
+        def broken_get(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests, 'get', broken_get)
+        bot = utils.MockTelegramBot()
+        table = make_table()
+        polling = engine.PollingEngine(bot, table, concurrency=2)
+        state = table['student0']
+
+        async def two_polls():
+            await polling.poll(state)
+            await polling.outbox.drain()
+            first_error = state.last_error
+            bot.text = None
+            await polling.poll(state)
+            await polling.outbox.drain()
+            return first_error
+
+        try:
+            first_error = asyncio.run(two_polls())
+        finally:
+            polling.close()
+        assert first_error and first_error == state.last_error
+        assert bot.text is None, (
+            'Повторная одинаковая ошибка не должна отправляться снова.'
+        )
+
+    def test_poll_reports_recovery(self, monkeypatch):
+        import engine
+        get_data = mock_get_with_data({'homeworks': [], 'current_date': 1})
+
+        def broken_get(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        bot = utils.MockTelegramBot()
+        table = make_table()
+        polling = engine.PollingEngine(bot, table, concurrency=2)
+        state = table['student0']
+        try:
+            monkeypatch.setattr(requests, 'get', broken_get)
+            poll_and_send(polling, state)
+            monkeypatch.setattr(requests, 'get', get_data)
+            poll_and_send(polling, state)
+        finally:
+            polling.close()
+        assert bot.text.startswith('Работа восстановлена'), (
+            'После сбоя нужно сообщить о восстановлении опроса.'
+        )
+        assert state.last_error == ''
+
+    def test_request_poll_wakes_run(self, monkeypatch):
+        import engine
+        calls = []
+
+        def counting_get(*args, **kwargs):
+            calls.append(args)
+            return mock_get_with_data(self.DATA)(*args, **kwargs)
+
+        monkeypatch.setattr(requests, 'get', counting_get)
+        table = make_table()
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, concurrency=2,
+            first_poll_spread=0
+        )
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            while not calls:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            polling.request_poll(table['student0'])
+            await asyncio.wait_for(wait_calls(2), 1)
+            task.cancel()
+
+        async def wait_calls(count):
+            while len(calls) < count:
+                await asyncio.sleep(0.01)
+
+        try:
+            asyncio.run(run())
+        finally:
+            polling.close()
+        assert len(calls) == 2, (
+            'Внеочередной опрос должен выполняться без ожидания периода.'
+        )
+
+    def test_polls_run_concurrently(self, monkeypatch):
+        import engine
+        monkeypatch.setattr(
+            requests, 'get', mock_get_with_data(self.DATA, delay=0.1)
+        )
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), make_table(50), concurrency=50
+        )
+        started = time.monotonic()
+        try:
+            asyncio.run(polling.poll_all())
+        finally:
+            polling.close()
+        assert time.monotonic() - started < 2, (
+            'Запросы должны выполняться одновременно, а не по очереди.'
+        )
+
+    def test_state_restored_and_saved(self, monkeypatch):
+        import engine
+        from storage import MemoryStateStore
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(self.DATA))
+        store = MemoryStateStore()
+        store.save('student0', 42, {}, '')
+        table = make_table()
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, store=store, concurrency=2
+        )
+        assert table['student0'].timestamp == 42, (
+            'После перезапуска опрос должен продолжаться с сохранённой метки.'
+        )
+        try:
+            asyncio.run(polling.poll_all())
+        finally:
+            polling.close()
+        assert store.records['student0'].timestamp == (
+            self.DATA['current_date']
+        )
+
+    def test_next_poll_follows_policy(self, monkeypatch):
+        import engine
+        from scheduler import PollingPolicy
+        data = dict(self.DATA, homeworks=[
+            {'homework_name': 'hw123', 'status': 'reviewing'}
+        ])
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(data))
+        table = make_table()
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, concurrency=2,
+            policy=PollingPolicy(min_period=10, reviewing_period=30,
+                                 night_hours=range(0))
+        )
+        started = time.monotonic()
+        try:
+            asyncio.run(polling.poll_all())
+        finally:
+            polling.close()
+        delay = table['student0'].next_poll - started
+        assert 30 <= delay < 31, (
+            'Следующий опрос должен назначаться по политике опроса.'
+        )
+
+    def test_open_breaker_skips_requests(self, monkeypatch):
+        import engine
+        calls = []
+
+        def broken_get(*args, **kwargs):
+            calls.append(1)
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests, 'get', broken_get)
+        table = make_table(20)
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, concurrency=1
+        )
+        polling.breaker.failure_threshold = 3
+        try:
+            asyncio.run(polling.poll_all())
+            calls.clear()
+            asyncio.run(polling.poll_all())
+        finally:
+            polling.close()
+        assert not calls, (
+            'После открытия автомата запросы к API не должны отправляться.'
+        )
+        retry_at = polling.breaker.retry_at
+        assert all(state.next_poll >= retry_at for state in table), (
+            'Опрос аккаунтов должен откладываться до закрытия автомата.'
+        )
+
+    def test_poll_deadline(self, monkeypatch):
+        import engine
+        monkeypatch.setattr(
+            requests, 'get', mock_get_with_data(self.DATA, delay=0.5)
+        )
+        table = make_table()
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, concurrency=2, deadline=0.1
+        )
+        try:
+            poll_and_send(polling)
+        finally:
+            polling.close()
+        state = table['student0']
+        assert state.failures == 1 and state.last_error, (
+            'Опрос дольше deadline должен считаться ошибкой.'
+        )
+
+    def test_request_has_timeout(self, monkeypatch, homework_module):
+        timeouts = []
+
+        def check_timeout(*args, timeout=None, **kwargs):
+            timeouts.append(timeout)
+            return mock_get_with_data(self.DATA)(*args, **kwargs)
+
+        monkeypatch.setattr(requests, 'get', check_timeout)
+        homework_module.get_api_answer(0)
+        assert timeouts == [homework_module.API_TIMEOUT], (
+            'Запрос к API должен выполняться с таймаутом.'
+        )
+
+    def test_stop_drains_outbox(self, monkeypatch):
+        import engine
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(self.DATA))
+        bot = utils.MockTelegramBot()
+        polling = engine.PollingEngine(
+            bot, make_table(), concurrency=2, first_poll_spread=0
+        )
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            while not polling.outbox:
+                await asyncio.sleep(0)
+            polling.stop()
+            await asyncio.wait_for(task, 1)
+
+        try:
+            asyncio.run(run())
+        finally:
+            polling.close()
+        assert not polling.outbox and bot.text, (
+            'После остановки очередь отправки должна быть дочищена.'
+        )
+
+    def test_reload_syncs_accounts(self, monkeypatch, homework_module):
+        import engine
+        from accounts import Account
+        table = make_table(2)
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, concurrency=2,
+            account_loader=lambda: [
+                Account('student0', 'new-token', '0'),
+                Account('student2', 'token2', '2'),
+            ]
+        )
+        table['student0'].statuses['1'] = ('approved', 0)
+        monkeypatch.setattr(homework_module, 'reload_config', lambda: True)
+        try:
+            polling.reload()
+        finally:
+            polling.close()
+        assert sorted(state.account.name for state in table) == [
+            'student0', 'student2'
+        ], 'После перезагрузки таблица должна совпадать со списком аккаунтов.'
+        assert table['student0'].account.practicum_token == 'new-token'
+        assert table['student0'].statuses == {'1': ('approved', 0)}, (
+            'Состояние оставшегося аккаунта должно сохраниться.'
+        )
+
+    def test_lease_reloads_state(self, monkeypatch):
+        import engine
+        from storage import MemoryStateStore
+
+        class Keeper:
+            held = False
+
+            def wait(self, timeout=None):
+                return self.held
+
+        keeper = Keeper()
+        store = MemoryStateStore()
+        table = make_table()
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), table, store=store, concurrency=2,
+            lease=keeper
+        )
+        store.save('student0', 1000198000, {'1': ('approved', 0)}, '')
+        try:
+            assert not asyncio.run(polling.hold_lease()), (
+                'Без аренды движок не должен опрашивать API.'
+            )
+            keeper.held = True
+            assert asyncio.run(polling.hold_lease())
+        finally:
+            polling.close()
+        assert table['student0'].timestamp == 1000198000, (
+            'Получив аренду, движок должен перечитать состояние аккаунтов.'
+        )
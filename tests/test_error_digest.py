@@ -0,0 +1,84 @@
+import pytest
+
+
+@pytest.fixture
+def digest_module():
+    import error_digest
+    return error_digest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestErrorAggregator:
+
+    def make(self, digest_module, **kwargs):
+        clock = FakeClock()
+        errors = digest_module.ErrorAggregator(
+            'Сбой: {error}', window=3600, clock=clock, **kwargs
+        )
+        sent = []
+
+        def send(message):
+            sent.append(message)
+            return True
+
+        return errors, clock, sent, send
+
+    def test_alternating_errors_are_aggregated(self, digest_module,
+                                               homework_module):
+        errors, clock, sent, send = self.make(digest_module)
+        http_error = homework_module.TheAnswerIsNot200Error(
+            'Код 500', status_code=500
+        )
+        for _ in range(10):
+            clock.now += 60
+            errors.record_error(ConnectionError('timeout'), send)
+            errors.record_error(http_error, send)
+        assert sent == ['Сбой: timeout', 'Сбой: Код 500'], (
+            'О каждом виде ошибки нужно сообщать один раз, а не каждый цикл.'
+        )
+        clock.now += 3600
+        errors.record_error(ConnectionError('timeout'), send)
+        assert sent[-1] == (
+            'Ошибки за последние 69 мин: ConnectionError x10, '
+            'TheAnswerIsNot200Error 500 x9'
+        )
+        errors.record_error(ConnectionError('timeout'), send)
+        assert len(sent) == 3, 'Сводка уходит не чаще раза за окно.'
+        errors.record_success(send)
+        assert sent[-1] == (
+            'Работа восстановлена после ошибок: ConnectionError x12, '
+            'TheAnswerIsNot200Error 500 x10'
+        )
+        errors.record_success(send)
+        assert len(sent) == 4 and not errors.failing
+
+    def test_memory_is_bounded(self, digest_module):
+        errors, clock, sent, send = self.make(digest_module, max_kinds=3)
+        for number in range(100):
+            error = type(f'Error{number}', (Exception,), {})()
+            errors.record_error(error, send)
+        assert len(sent) == 3
+        assert len(errors.totals) <= 4 and len(errors.pending) <= 4
+        assert errors.totals[digest_module.OTHER_ERRORS] == 97
+
+    def test_failed_send_is_retried(self, digest_module):
+        errors, clock, sent, send = self.make(digest_module)
+        errors.record_error(ConnectionError('timeout'), lambda message: False)
+        assert errors.last_message == ''
+        errors.record_error(ConnectionError('timeout'), send)
+        assert sent == ['Сбой: timeout']
+
+    def test_recovery_after_restart(self, digest_module):
+        errors, clock, sent, send = self.make(
+            digest_module, last_message='Сбой: timeout'
+        )
+        errors.record_success(send)
+        assert sent == [digest_module.ERROR_RECOVERY]
+        assert errors.last_message == ''
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+
+def make_hedger(**kwargs):
+    from hedging import Hedger
+    hedger = Hedger(min_samples=5, min_delay=0.01, **kwargs)
+    hedger.samples.extend([0.02] * 5)
+    return hedger
+
+
+class TestHedger:
+
+    def test_no_hedge_without_samples(self):
+        from hedging import Hedger
+        hedger = Hedger(min_samples=5)
+        assert hedger.delay() is None
+        hedger.samples.extend([0.1, 0.2, 0.3, 0.4, 1.0])
+        assert hedger.delay() == 1.0
+
+    def test_hedge_wins_on_slow_primary(self):
+        hedger = make_hedger()
+        delays = [1, 0]
+
+        async def request():
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return delay
+
+        assert asyncio.run(hedger.call(request)) == 0, (
+            'Должен использоваться первый пришедший ответ.'
+        )
+        assert (hedger.sent, hedger.won) == (1, 1)
+
+    def test_fast_primary_is_not_hedged(self):
+        hedger = make_hedger()
+
+        async def request():
+            return 'answer'
+
+        assert asyncio.run(hedger.call(request)) == 'answer'
+        assert hedger.sent == 0
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        hedger = make_hedger()
+        calls = []
+
+        async def request():
+            calls.append(1)
+            if len(calls) == 2:
+                raise ConnectionError('hedge failed')
+            await asyncio.sleep(0.1)
+            return 'primary'
+
+        assert asyncio.run(hedger.call(request)) == 'primary'
+        assert (hedger.sent, hedger.won) == (1, 0)
+
+    def test_both_failed(self):
+        hedger = make_hedger()
+
+        async def request():
+            await asyncio.sleep(0.05)
+            raise ConnectionError('failed')
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(hedger.call(request))
@@ -0,0 +1,83 @@
+import pytest
+
+
+@pytest.fixture
+def history_path(tmp_path):
+    return str(tmp_path / 'history.bin')
+
+
+def write_history(path, rows):
+    from history import HistoryStore
+    store = HistoryStore(path, buffer_size=2)
+    for row in rows:
+        store.append(*row)
+    store.close()
+
+
+class TestHistoryStore:
+    ROWS = [
+        ('student0', '1', 'reviewing', '2022-01-01T10:00:00Z'),
+        ('student0', '1', 'rejected', '2022-01-01T12:00:00Z'),
+        ('student0', '1', 'reviewing', '2022-01-02T10:00:00Z'),
+        ('student0', '1', 'approved', '2022-01-02T11:00:00Z'),
+        ('student1', '1', 'reviewing', '2022-01-01T10:00:00Z'),
+        ('student1', '1', 'approved', '2022-01-01T14:00:00Z'),
+    ]
+
+    def test_records_are_fixed_width(self, history_path):
+        from history import RECORD, read_history, row_key
+        write_history(history_path, self.ROWS)
+        records = read_history(history_path)
+        assert len(records) == len(self.ROWS)
+        assert records[1][:2] == (row_key('student0', '1'), 1641038400), (
+            'Время смены статуса берётся из date_updated.'
+        )
+        with open(history_path, 'ab') as file:
+            file.write(b'\0' * (RECORD.size // 2))
+        write_history(history_path, self.ROWS[:1])
+        assert len(read_history(history_path)) == len(self.ROWS) + 1, (
+            'Недописанная запись в конце файла должна отрезаться.'
+        )
+
+    def test_time_falls_back_to_now(self, history_path):
+        from history import read_history
+        write_history(history_path, [('student0', '1', 'approved', None,
+                                      1000198000)])
+        assert read_history(history_path)[0][1] == 1000198000
+
+    def test_review_stats(self, history_path):
+        pytest.importorskip('numpy')
+        from history import format_stats, load_history, review_stats
+        write_history(history_path, self.ROWS)
+        stats = review_stats(load_history(history_path), utc_offset=0)
+        assert stats.records == 6 and stats.reviews == 3, (
+            'Проверка - от reviewing до следующего вердикта той же работы.'
+        )
+        assert stats.turnaround[50] == 2 * 3600
+        assert stats.rejection_rate == pytest.approx(1 / 3)
+        assert stats.hourly[10] == 3 and sum(stats.hourly) == 6
+        assert 'p50=2.0' in format_stats(stats)
+
+    def test_missing_numpy_error(self, monkeypatch):
+        import sys
+        from history import NUMPY_REQUIRED, require_numpy
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+        with pytest.raises(ImportError, match=NUMPY_REQUIRED):
+            require_numpy()
+
+    def test_send_updates_writes_history(self, monkeypatch, history_path,
+                                         homework_module):
+        import utils
+        from history import HistoryStore, read_history
+        records = homework_module.check_response({'homeworks': [
+            {'homework_name': 'hw', 'status': 'approved', 'id': 7,
+             'date_updated': '2022-01-01T12:00:00Z'}
+        ]})
+        history = HistoryStore(history_path)
+        homework_module.send_updates(
+            utils.MockTelegramBot(), records, {}, history
+        )
+        history.close()
+        assert len(read_history(history_path)) == 1, (
+            'Отправленная смена статуса должна попадать в историю.'
+        )
@@ -0,0 +1,62 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpPool:
+
+    def test_connections_are_reused(self, local_server):
+        import http_pool
+        session = http_pool.create_session(pool_maxsize=2)
+        try:
+            for _ in range(5):
+                session.get(local_server).json()
+            stats = http_pool.pool_stats(session)
+        finally:
+            session.close()
+        assert stats == {'connections': 1, 'requests': 5, 'reused': 4}, (
+            'Запросы к одному хосту должны переиспользовать соединение.'
+        )
+
+    def test_request_api_answer_uses_session(self, monkeypatch,
+                                             local_server, homework_module):
+        import http_pool
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_server)
+        session = http_pool.create_session()
+        try:
+            for timestamp in range(3):
+                answer = homework_module.request_api_answer(
+                    homework_module.HEADERS, timestamp, session
+                )
+            stats = http_pool.pool_stats(session)
+        finally:
+            session.close()
+        assert answer == {'homeworks': [], 'current_date': 1}
+        assert stats['reused'] == 2
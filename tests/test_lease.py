@@ -0,0 +1,79 @@
+import pytest
+import requests
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    return now
+
+
+class TestLease:
+
+    def test_file_lease_is_exclusive(self, tmp_path):
+        import lease
+        if lease.fcntl is None:
+            pytest.skip('нет fcntl')
+        first = lease.FileLease('homework', str(tmp_path))
+        second = lease.FileLease('homework', str(tmp_path))
+        try:
+            assert first.acquire() and first.acquire()
+            assert not second.acquire(), (
+                'Аренду через файл может держать только один экземпляр.'
+            )
+            first.release()
+            assert second.acquire(), (
+                'Отпущенную аренду должен получать другой экземпляр.'
+            )
+        finally:
+            first.release()
+            second.release()
+
+    def test_sqlite_lease_expires(self, tmp_path, clock):
+        from lease import SQLiteLease
+        path = str(tmp_path / 'state.sqlite3')
+        first = SQLiteLease('homework', path, ttl=30, clock=lambda: clock[0])
+        second = SQLiteLease('homework', path, ttl=30,
+                             clock=lambda: clock[0])
+        second.holder += '-second'
+        try:
+            assert first.acquire()
+            clock[0] += 20
+            assert not second.acquire()
+            assert first.acquire(), 'Владелец должен продлевать аренду.'
+            clock[0] += 31
+            assert second.acquire(), (
+                'Аренду без продления должен забирать другой экземпляр.'
+            )
+            assert not first.acquire()
+        finally:
+            first.release()
+            second.release()
+
+    def test_keeper_tracks_lease(self):
+        from lease import LeaseKeeper, NullLease
+
+        class Busy(NullLease):
+            free = False
+
+            def acquire(self):
+                return self.free
+
+        keeper = LeaseKeeper(Busy('homework'), retry=0.01).start()
+        try:
+            assert not keeper.held and not keeper.wait(0.05)
+            keeper.lease.free = True
+            assert keeper.wait(1), 'Освободившуюся аренду нужно получать.'
+        finally:
+            keeper.stop()
+        assert not keeper.held
+
+    def test_once_skips_without_lease(self, monkeypatch, homework_module):
+        from lease import NullLease
+
+        def forbidden_get(*args, **kwargs):
+            raise AssertionError('Без аренды API не опрашивается.')
+
+        monkeypatch.setattr(requests, 'get', forbidden_get)
+        monkeypatch.setattr(NullLease, 'acquire', lambda self: False)
+        homework_module.once()
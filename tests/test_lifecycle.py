@@ -0,0 +1,90 @@
+import json
+import os
+import signal
+import time
+
+import pytest
+import requests
+
+import utils
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(signal, 'SIGHUP'), reason='нужны сигналы POSIX'
+)
+
+
+class TestSignalHandler:
+
+    def test_stop_signal_interrupts_sleep(self):
+        from lifecycle import SignalHandler
+        signals = SignalHandler().install()
+        try:
+            started = time.monotonic()
+            with signals.interruptible():
+                os.kill(os.getpid(), signal.SIGTERM)
+                time.sleep(5)
+        finally:
+            signals.restore()
+        assert time.monotonic() - started < 1, (
+            'Сигнал остановки должен прерывать ожидание.'
+        )
+        assert signals.stopping
+
+    def test_reload_flag_is_taken_once(self):
+        from lifecycle import SignalHandler
+        signals = SignalHandler().install()
+        try:
+            os.kill(os.getpid(), signal.SIGHUP)
+        finally:
+            signals.restore()
+        assert not signals.stopping
+        assert signals.take_reload() and not signals.take_reload(), (
+            'Флаг перезагрузки должен сбрасываться после проверки.'
+        )
+        assert signal.getsignal(signal.SIGHUP) is signal.SIG_DFL
+
+    def test_main_stops_on_sigterm(self, monkeypatch, homework_module):
+        data = {'homeworks': [], 'current_date': 1000198000}
+        monkeypatch.setattr(
+            requests, 'get', utils.mock_get_with_data(data)
+        )
+        monkeypatch.setattr(homework_module.telegram, 'Bot',
+                            utils.MockTelegramBot)
+        sleeps = []
+        real_sleep = time.sleep
+
+        def sleep(seconds):
+            if seconds != homework_module.RETRY_PERIOD:
+                return real_sleep(seconds)
+            sleeps.append(seconds)
+            os.kill(os.getpid(), signal.SIGTERM)
+            real_sleep(5)
+
+        monkeypatch.setattr(time, 'sleep', sleep)
+        homework_module.main()
+        assert sleeps == [homework_module.RETRY_PERIOD], (
+            'После SIGTERM main должна завершиться после текущего цикла.'
+        )
+
+    def test_reload_config_reads_verdicts(self, monkeypatch, tmp_path,
+                                          homework_module):
+        verdicts = dict(homework_module.HOMEWORK_VERDICTS)
+        path = tmp_path / 'verdicts.json'
+        path.write_text(json.dumps(
+            dict(verdicts, approved='Принято!'), ensure_ascii=False
+        ), encoding='utf-8')
+        monkeypatch.setenv('VERDICTS_FILE', str(path))
+        monkeypatch.setattr(homework_module, 'load_dotenv', lambda **_: None)
+        for name in ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID'):
+            monkeypatch.setattr(
+                homework_module, name, getattr(homework_module, name)
+            )
+        monkeypatch.setitem(homework_module.HEADERS, 'Authorization',
+                            homework_module.HEADERS['Authorization'])
+        try:
+            assert homework_module.reload_config()
+            assert homework_module.HOMEWORK_VERDICTS['approved'] == (
+                'Принято!'
+            ), 'Вердикты должны перечитываться из VERDICTS_FILE.'
+        finally:
+            homework_module.reload_templates(verdicts)
@@ -0,0 +1,69 @@
+import atexit
+import json
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def log_config_module():
+    import log_config
+    return log_config
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestLogConfig:
+
+    def test_lazy_message_is_formatted_on_demand(self, log_config_module):
+        calls = []
+
+        class Parameters(dict):
+            def __format__(self, spec):
+                calls.append(spec)
+                return 'parameters'
+
+        error = ConnectionError(log_config_module.LazyMessage(
+            'Запрос {parameters}', parameters=Parameters()
+        ))
+        assert calls == [], 'Сообщение не должно собираться заранее.'
+        assert str(error) == 'Запрос parameters'
+        assert calls == [''], 'Сообщение должно собираться при выводе.'
+
+    def test_queue_listener_writes_rotating_file(
+            self, tmp_path, log_config_module, restore_root_logger):
+        log_file = tmp_path / 'bot.log'
+        listener = log_config_module.setup_logging(
+            str(log_file), level='INFO', log_format='json', max_bytes=200,
+            backup_count=2
+        )
+        root = logging.getLogger()
+        assert [type(handler) for handler in root.handlers] == [
+            log_config_module.DeferredQueueHandler
+        ], 'Корневой логгер должен писать только в очередь.'
+        logger = logging.getLogger('test_rotation')
+        for number in range(20):
+            logger.info(log_config_module.LazyMessage(
+                'Сообщение {number}', number=number
+            ))
+        logger.debug('не попадёт в лог')
+        atexit.unregister(listener.stop)
+        listener.stop()
+        lines = log_file.read_text(encoding='utf-8').splitlines()
+        record = json.loads(lines[-1])
+        assert record['message'] == 'Сообщение 19'
+        assert record['level'] == 'INFO'
+        assert (tmp_path / 'bot.log.1').exists(), (
+            'Файл лога должен ротироваться по размеру.'
+        )
+        assert not (tmp_path / 'bot.log.3').exists()
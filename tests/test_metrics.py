@@ -0,0 +1,83 @@
+import asyncio
+import urllib.request
+
+import pytest
+import requests
+
+import utils
+from utils import make_table, mock_get_with_data, poll_and_send
+
+
+@pytest.fixture
+def metrics_module():
+    import metrics
+    return metrics
+
+
+class TestMetrics:
+
+    def test_counter_and_gauge(self, metrics_module):
+        registry = metrics_module.Registry()
+        counter = registry.register(metrics_module.Counter(
+            'errors_total', 'Ошибки', ('error',)
+        ))
+        counter.inc('ConnectionError')
+        counter.inc('ConnectionError')
+        registry.register(metrics_module.Gauge(
+            'depth', 'Очередь', collect=lambda: {(): 3}
+        ))
+        text = registry.render()
+        assert 'errors_total{error="ConnectionError"} 2' in text
+        assert '# TYPE depth gauge\ndepth 3' in text
+
+    def test_histogram(self, metrics_module):
+        registry = metrics_module.Registry()
+        histogram = registry.register(metrics_module.Histogram(
+            'latency_seconds', 'Задержка', ('stage',), buckets=(0.1, 1)
+        ))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value, 'get')
+        text = registry.render()
+        for line in (
+            'latency_seconds_bucket{stage="get",le="0.1"} 2',
+            'latency_seconds_bucket{stage="get",le="1.0"} 3',
+            'latency_seconds_bucket{stage="get",le="+Inf"} 4',
+            'latency_seconds_sum{stage="get"} 5.65',
+            'latency_seconds_count{stage="get"} 4',
+        ):
+            assert line in text, f'В выгрузке нет строки {line}'
+
+    def test_metrics_endpoint(self, metrics_module):
+        server = metrics_module.start_metrics_server(port=0)
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            with urllib.request.urlopen(url) as response:
+                text = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE homework_stage_seconds histogram' in text
+
+    def test_engine_records_stages(self, monkeypatch, metrics_module):
+        import engine
+        data = {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': 1000198000
+        }
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(data))
+        polling = engine.PollingEngine(
+            utils.MockTelegramBot(), make_table(), concurrency=2
+        )
+        try:
+            poll_and_send(polling)
+            asyncio.run(polling.poll_all())
+        finally:
+            polling.close()
+        stages = {
+            labels[0] for labels in metrics_module.STAGE_SECONDS.values
+        }
+        assert {'get_api_answer', 'check_response', 'parse_status',
+                'send_message'} <= stages
+        text = metrics_module.REGISTRY.render()
+        assert 'homework_outbox_depth 0' in text
+        assert 'homework_watermark_age_seconds{account="student0"}' in text
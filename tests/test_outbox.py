@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import telegram
+
+
+class RecordingBot:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+async def run_blocking(func, *args):
+    return func(*args)
+
+
+def make_outbox(bot, **kwargs):
+    from outbox import Outbox
+    return Outbox(bot, run_blocking, **kwargs)
+
+
+class TestTokenBucket:
+
+    def test_rate(self):
+        from outbox import TokenBucket
+        now = [0]
+        bucket = TokenBucket(rate=2, clock=lambda: now[0])
+        assert bucket.wait_time() == 0
+        bucket.take()
+        assert bucket.wait_time() == 0.5
+        now[0] = 0.5
+        assert bucket.wait_time() == 0
+
+
+class TestOutbox:
+
+    def test_messages_for_chat_are_coalesced(self):
+        bot = RecordingBot()
+        outbox = make_outbox(bot)
+        for message in ('first', 'second', 'third'):
+            outbox.put('1', message)
+        outbox.put('2', 'other')
+        assert len(outbox) == 4
+        asyncio.run(outbox.drain())
+        assert [(chat, text) for chat, text, _ in bot.sent] == [
+            ('1', 'first\n\nsecond\n\nthird'), ('2', 'other')
+        ], 'Сообщения одного чата должны склеиваться в одно.'
+        assert len(outbox) == 0 and not outbox.pending
+
+    def test_long_batch_is_split(self):
+        from outbox import MAX_MESSAGE_LENGTH
+        bot = RecordingBot()
+        outbox = make_outbox(bot, chat_rate=1000)
+        half = MAX_MESSAGE_LENGTH // 2 - 1
+        for _ in range(3):
+            outbox.put('1', 'x' * half)
+        asyncio.run(outbox.drain())
+        assert [len(text) for _, text, _ in bot.sent] == [
+            MAX_MESSAGE_LENGTH, half
+        ], 'Склеенное сообщение не должно превышать лимит Telegram.'
+
+    def test_retry_after_is_respected(self):
+        bot = RecordingBot(errors=[telegram.error.RetryAfter(0.2)])
+        outbox = make_outbox(bot)
+        outbox.put('1', 'status')
+        started = time.monotonic()
+        asyncio.run(outbox.drain())
+        assert [text for _, text, _ in bot.sent] == ['status'], (
+            'После RetryAfter сообщение должно быть отправлено повторно.'
+        )
+        assert bot.sent[0][2] - started >= 0.2, (
+            'Повторная отправка должна ждать время из RetryAfter.'
+        )
+
+    def test_chat_rate_limit(self):
+        bot = RecordingBot()
+        outbox = make_outbox(bot, chat_rate=10)
+
+        async def send_twice():
+            outbox.put('1', 'first')
+            await outbox.drain()
+            outbox.put('1', 'second')
+            await outbox.drain()
+
+        asyncio.run(send_twice())
+        assert bot.sent[1][2] - bot.sent[0][2] >= 0.09, (
+            'Отправка в один чат должна соблюдать лимит частоты.'
+        )
+
+    def test_permanent_error_is_dropped(self, caplog):
+        bot = RecordingBot(errors=[telegram.error.BadRequest('chat')])
+        outbox = make_outbox(bot)
+        outbox.put('1', 'status')
+        asyncio.run(outbox.drain())
+        assert not bot.sent and not outbox.pending
+        assert any(record.levelname == 'ERROR' for record in caplog.records)
+
+    def test_worker_sends_in_background(self):
+        bot = RecordingBot()
+        outbox = make_outbox(bot)
+
+        async def produce():
+            worker = asyncio.ensure_future(outbox.run())
+            await asyncio.sleep(0)
+            outbox.put('1', 'status')
+            await asyncio.sleep(0.05)
+            worker.cancel()
+
+        asyncio.run(produce())
+        assert [text for _, text, _ in bot.sent] == ['status']
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture
+def clean_templates(homework_module):
+    verdicts = dict(homework_module.HOMEWORK_VERDICTS)
+    template = homework_module.CHANGE_HOMEWORK_STATUS
+    homework_module.format_status.cache_clear()
+    yield homework_module
+    homework_module.reload_templates(verdicts, template)
+
+
+class TestRenderCache:
+
+    def test_repeated_status_is_cached(self, clean_templates):
+        homework_module = clean_templates
+        record = homework_module.HomeworkRecord('hw1', 'approved', 1, None)
+        first = homework_module.render_status(record)
+        second = homework_module.render_status(record._replace(id=2))
+        assert first == second
+        info = homework_module.format_status.cache_info()
+        assert (info.hits, info.misses) == (1, 1), (
+            'Одинаковое сообщение должно браться из кэша.'
+        )
+
+    def test_reload_invalidates_cache(self, clean_templates):
+        homework_module = clean_templates
+        record = homework_module.HomeworkRecord('hw1', 'approved', 1, None)
+        homework_module.render_status(record)
+        homework_module.reload_templates(
+            dict(homework_module.HOMEWORK_VERDICTS, approved='Зачтено'),
+            '{homework_name}: {verdict}'
+        )
+        assert homework_module.render_status(record) == 'hw1: Зачтено', (
+            'После перезагрузки шаблонов текст должен строиться заново.'
+        )
+        assert homework_module.format_status.cache_info().hits == 0
+
+    def test_reload_updates_validator(self, clean_templates):
+        homework_module = clean_templates
+        homework_module.reload_templates(
+            dict(homework_module.HOMEWORK_VERDICTS, new='Новая')
+        )
+        record = homework_module.validate_homework(
+            {'homework_name': 'hw', 'status': 'new'}
+        )
+        assert homework_module.render_status(record).endswith('Новая')
@@ -0,0 +1,95 @@
+import email.utils
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def resilience_module():
+    import resilience
+    return resilience
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self, resilience_module):
+        clock = FakeClock()
+        breaker = resilience_module.CircuitBreaker(
+            'api', failure_threshold=3, reset_timeout=60, clock=clock
+        )
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == resilience_module.CLOSED
+        breaker.record_failure()
+        assert breaker.state == resilience_module.OPEN
+        assert not breaker.allow_request(), (
+            'Открытый автомат не должен пропускать запросы.'
+        )
+
+    def test_half_open_allows_single_probe(self, resilience_module):
+        clock = FakeClock()
+        breaker = resilience_module.CircuitBreaker(
+            'api', failure_threshold=1, reset_timeout=60, clock=clock
+        )
+        breaker.record_failure()
+        clock.now = 60
+        assert breaker.state == resilience_module.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request(), (
+            'В полуоткрытом состоянии пропускается один пробный запрос.'
+        )
+        breaker.record_failure()
+        assert breaker.state == resilience_module.OPEN
+        clock.now = 120
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == resilience_module.CLOSED
+        assert breaker.allow_request() and breaker.allow_request()
+
+    def test_retry_after_opens_immediately(self, resilience_module):
+        clock = FakeClock()
+        breaker = resilience_module.CircuitBreaker(
+            'api', failure_threshold=5, reset_timeout=60, clock=clock
+        )
+        breaker.record_failure(retry_after=300)
+        assert breaker.state == resilience_module.OPEN
+        assert breaker.retry_at == 300, (
+            'Автомат должен ждать столько, сколько попросил сервер.'
+        )
+
+
+class TestBackoff:
+
+    def test_full_jitter_bounds(self, resilience_module):
+        for attempt in range(10):
+            for _ in range(50):
+                delay = resilience_module.backoff_delay(
+                    attempt, base=1, cap=100
+                )
+                assert 0 <= delay <= min(100, 2 ** attempt)
+
+    def test_parse_retry_after(self, resilience_module):
+        assert resilience_module.parse_retry_after('120') == 120
+        assert resilience_module.parse_retry_after(None) is None
+        assert resilience_module.parse_retry_after('garbage') is None
+        date = email.utils.formatdate(1000198060, usegmt=True)
+        assert resilience_module.parse_retry_after(
+            date, now=1000198000
+        ) == 60
+
+    def test_endpoint_failures(self, resilience_module, homework_module):
+        error_class = homework_module.TheAnswerIsNot200Error
+        assert resilience_module.is_endpoint_failure(ConnectionError())
+        assert resilience_module.is_endpoint_failure(
+            error_class('', status_code=503)
+        )
+        assert not resilience_module.is_endpoint_failure(
+            error_class('', status_code=401)
+        ), 'Ошибка авторизации аккаунта не должна открывать автомат.'
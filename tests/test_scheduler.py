@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def policy():
+    from scheduler import PollingPolicy
+    return PollingPolicy(
+        min_period=60, max_period=3600, base_period=600,
+        reviewing_period=120, idle_after=86400, night_hours=range(0)
+    )
+
+
+class TestPollingPolicy:
+    NOW = 1000198000
+    REVIEWING = {'1': ['reviewing', None], '2': ['approved', None]}
+    APPROVED = {'1': ['approved', None]}
+
+    def test_reviewing_is_polled_often(self, policy):
+        assert policy.interval(self.REVIEWING, self.NOW, self.NOW) == 120, (
+            'Пока работа на ревью, опрашивать API нужно чаще.'
+        )
+
+    def test_idle_account_backs_off(self, policy):
+        intervals = [
+            policy.interval(self.APPROVED, self.NOW - days * 86400, self.NOW)
+            for days in (0, 1, 2, 30)
+        ]
+        assert intervals == [600, 1200, 2400, 3600], (
+            'Без изменений период опроса должен расти до максимума.'
+        )
+
+    def test_night_slows_polling(self, policy):
+        hour = time.localtime(self.NOW).tm_hour
+        policy.night_hours = range(hour, hour + 1)
+        assert policy.interval(self.REVIEWING, self.NOW, self.NOW) == 360
+        policy.night_factor = 100
+        assert policy.interval({}, self.NOW, self.NOW) == 3600
+
+    def test_invalid_bounds(self):
+        from scheduler import PollingPolicy
+        with pytest.raises(ValueError):
+            PollingPolicy(min_period=100, max_period=10)
+
+
+class TestPollQueue:
+
+    def test_pops_due_in_order_with_lag(self):
+        from scheduler import PollQueue
+        queue = PollQueue()
+        for key, when in (('b', 20), ('a', 10), ('c', 30)):
+            queue.schedule(key, when)
+        assert queue.next_due() == 10
+        assert queue.pop_due(25) == [('a', 15), ('b', 5)], (
+            'Наступившие опросы снимаются по порядку вместе с опозданием.'
+        )
+        assert len(queue) == 1 and queue.next_due() == 30
+
+    def test_reschedule_and_remove(self):
+        from scheduler import PollQueue
+        queue = PollQueue()
+        queue.schedule('a', 10)
+        queue.schedule('b', 20)
+        queue.schedule('a', 40)
+        queue.remove('b')
+        assert queue.pop_due(30) == [], (
+            'Перенесённые и снятые опросы не должны выполняться.'
+        )
+        assert queue.pop_due(40) == [('a', 0)]
+
+    def test_stale_entries_are_compacted(self):
+        from scheduler import PollQueue
+        queue = PollQueue()
+        for when in range(1000):
+            queue.schedule('a', when)
+        assert len(queue) == 1 and len(queue.heap) < 100, (
+            'Куча не должна расти от переносов одного опроса.'
+        )
+
+    def test_next_due_keeps_fixed_rate(self):
+        from scheduler import next_due
+        assert next_due(100, 600, 130) == 700, (
+            'Шаг отсчитывается от назначенного времени, а не от окончания.'
+        )
+        assert next_due(100, 600, 900) == 900
+        assert next_due(200, 600, 150) == 750
+
+    def test_first_polls_are_spread(self):
+        from scheduler import first_poll_offset
+        offsets = [first_poll_offset(f'student{i}', 60) for i in range(1000)]
+        assert all(0 <= offset < 60 for offset in offsets)
+        assert max(offsets) - min(offsets) > 50, (
+            'Первые опросы должны распределяться по всему интервалу.'
+        )
+        assert first_poll_offset('student0', 60) == offsets[0]
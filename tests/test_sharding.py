@@ -0,0 +1,85 @@
+import os
+import time
+
+import pytest
+
+
+@pytest.fixture
+def names():
+    return [f'student{i}' for i in range(2000)]
+
+
+class TestHashRing:
+
+    def test_accounts_are_balanced(self, names):
+        from sharding import HashRing
+        ring = HashRing(4)
+        counts = [0] * 4
+        for name in names:
+            counts[ring.shard(name)] += 1
+        assert min(counts) > len(names) / 4 * 0.7, (
+            'Аккаунты должны распределяться по шардам примерно поровну.'
+        )
+
+    def test_resize_moves_few_accounts(self, names):
+        from sharding import HashRing
+        old, new = HashRing(4), HashRing(5)
+        moved = [name for name in names if old.shard(name) != new.shard(name)]
+        assert all(new.shard(name) == 4 for name in moved), (
+            'При добавлении шарда аккаунты должны переезжать только в него.'
+        )
+        assert len(moved) < len(names) / 5 * 1.5
+
+    def test_shard_accounts(self, monkeypatch):
+        from accounts import Account
+        from sharding import HashRing, shard_accounts
+        accounts = [Account(f'student{i}', 'token', str(i))
+                    for i in range(100)]
+        monkeypatch.setenv('SHARDS', '3')
+        shards = [shard_accounts(shard, lambda: accounts)
+                  for shard in range(3)]
+        assert sorted(sum(shards, []), key=accounts.index) == accounts, (
+            'Каждый аккаунт должен попасть ровно в один шард.'
+        )
+        ring = HashRing(3)
+        assert all(ring.shard(account.name) == 1 for account in shards[1])
+
+
+class TestSupervisor:
+
+    def test_crashed_worker_is_restarted(self):
+        from sharding import Supervisor
+        now = [0]
+        supervisor = Supervisor(
+            shards=2, target=os._exit, clock=lambda: now[0]
+        )
+        try:
+            supervisor.check()
+            first = dict(supervisor.workers)
+            for process in first.values():
+                process.join(10)
+            supervisor.check()
+            assert not supervisor.workers and supervisor.failures == {
+                0: 1, 1: 1
+            }, 'Упавший процесс должен перезапускаться с задержкой.'
+            now[0] = 61
+            supervisor.check()
+            assert sorted(supervisor.workers) == [0, 1]
+            assert all(supervisor.workers[shard] is not first[shard]
+                       for shard in first)
+        finally:
+            supervisor.stop()
+
+    def test_resize_stops_extra_workers(self):
+        from sharding import Supervisor
+        supervisor = Supervisor(shards=3, target=time.sleep)
+        try:
+            supervisor.check()
+            extra = supervisor.workers[2]
+            supervisor.resize(2)
+            assert 2 not in supervisor.workers and supervisor.shards == 2, (
+                'Лишние процессы шардов должны останавливаться.'
+            )
+            assert not extra.is_alive()
+        finally:
+            supervisor.stop()
@@ -0,0 +1,61 @@
+import pytest
+
+import utils
+
+
+class TestStatusIndex:
+    HOMEWORKS = [
+        {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing',
+         'date_updated': '2020-02-13T14:40:57Z'},
+        {'id': 2, 'homework_name': 'hw2', 'status': 'approved',
+         'date_updated': '2020-02-13T15:00:00Z'},
+        {'homework_name': 'hw3', 'status': 'rejected'},
+    ]
+
+    @pytest.fixture
+    def records(self, homework_module):
+        return homework_module.check_response({'homeworks': self.HOMEWORKS})
+
+    def test_every_homework_is_reported(self, homework_module, records):
+        statuses = {}
+        updates = homework_module.collect_updates(records, statuses)
+        assert [key for key, _, _ in updates] == ['1', '2', 'hw3'], (
+            'Нужно сообщать об изменении каждой работы из ответа, '
+            'а не только первой.'
+        )
+        assert statuses == {}, (
+            'Индекс должен обновляться только после отправки сообщения.'
+        )
+
+    def test_only_transitions_are_reported(self, homework_module, records):
+        bot = utils.MockTelegramBot()
+        statuses = {}
+        assert homework_module.send_updates(bot, records, statuses)
+        assert homework_module.collect_updates(records, statuses) == []
+        changed = records[0]._replace(status='approved')
+        updates = homework_module.collect_updates(
+            [changed] + records[1:], statuses
+        )
+        assert [key for key, _, _ in updates] == ['1']
+        assert updates[0][2].endswith(
+            homework_module.HOMEWORK_VERDICTS['approved']
+        )
+
+    def test_failed_send_is_retried(self, monkeypatch, homework_module,
+                                    records):
+        sent = []
+
+        def flaky_send_message(bot, message):
+            sent.append(message)
+            return len(sent) != 2
+
+        monkeypatch.setattr(homework_module, 'send_message',
+                            flaky_send_message)
+        statuses = {}
+        assert not homework_module.send_updates(None, records, statuses)
+        assert set(statuses) == {'1', 'hw3'}
+        sent.clear()
+        assert homework_module.send_updates(None, records, statuses)
+        assert len(sent) == 1, (
+            'Повторно должна отправляться только неотправленная работа.'
+        )
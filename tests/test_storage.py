@@ -0,0 +1,67 @@
+import pytest
+
+
+@pytest.fixture
+def storage_module():
+    import storage
+    return storage
+
+
+class TestStateStore:
+
+    def test_empty_state(self, storage_module):
+        store = storage_module.MemoryStateStore()
+        assert store.load('alice') == (0, {}, ''), (
+            'Для нового аккаунта опрос должен начинаться с нуля.'
+        )
+
+    def test_sqlite_state_survives_restart(self, tmp_path, storage_module):
+        path = str(tmp_path / 'state.sqlite3')
+        store = storage_module.SQLiteStateStore(path)
+        store.save('alice', 123, {'hw1': 'approved'}, 'error')
+        store.close()
+        store = storage_module.SQLiteStateStore(path)
+        try:
+            assert store.load('alice') == (123, {'hw1': 'approved'}, 'error')
+        finally:
+            store.close()
+
+    def test_write_behind(self, tmp_path, storage_module):
+        path = str(tmp_path / 'state.sqlite3')
+        store = storage_module.SQLiteStateStore(path, flush_period=3600)
+        writes = []
+        original_write = store.write
+
+        def counting_write(records):
+            writes.append(dict(records))
+            original_write(records)
+
+        store.write = counting_write
+        for timestamp in range(10):
+            store.save('alice', timestamp, {}, '')
+            store.save('bob', timestamp, {}, '')
+            store.maybe_flush()
+        assert not writes, (
+            'До истечения flush_period состояние не должно писаться на диск.'
+        )
+        assert store.load('alice').timestamp == 9
+        store.close()
+        assert len(writes) == 1 and set(writes[0]) == {'alice', 'bob'}, (
+            'Накопленные изменения должны записываться одной пачкой.'
+        )
+
+    def test_unchanged_state_is_not_written(self, storage_module):
+        store = storage_module.MemoryStateStore(flush_period=0)
+        store.save('alice', 1, {'hw1': 'reviewing'}, '')
+        store.flush()
+        statuses = store.load('alice').statuses
+        statuses['hw1'] = 'approved'
+        assert store.load('alice').statuses == {'hw1': 'reviewing'}, (
+            'Изменение загруженного словаря не должно менять хранилище.'
+        )
+        store.save('alice', 1, {'hw1': 'reviewing'}, '')
+        assert not store.pending
+
+    def test_unknown_backend(self, storage_module):
+        with pytest.raises(ValueError):
+            storage_module.open_state_store('redis')
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+import requests
+
+import utils
+from utils import make_table, poll_and_send
+
+
+@pytest.fixture
+def streaming_module():
+    import streaming
+    return streaming
+
+
+def split(body, size=1):
+    data = json.dumps(body, ensure_ascii=False).encode()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestResponseStream:
+    BODY = {
+        'homeworks': [
+            {'id': 123456, 'homework_name': 'Работа №1', 'status': 'approved',
+             'reviewer_comment': 'Всё "нравится"', 'score': 10.5},
+            {'id': 7, 'homework_name': 'hw2', 'status': 'rejected',
+             'nested': {'list': [1, [2, {}]], 'flag': True, 'none': None}},
+        ],
+        'current_date': 1581604970
+    }
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 7, 4096])
+    def test_items_and_fields(self, streaming_module, size):
+        stream = streaming_module.ResponseStream(
+            split(self.BODY, size), 'homeworks'
+        )
+        assert list(stream) == self.BODY['homeworks'], (
+            'Элементы должны разбираться независимо от деления на куски.'
+        )
+        assert stream.get('current_date') == self.BODY['current_date']
+        assert stream.count == 2
+
+    def test_items_before_body_is_read(self, streaming_module):
+        chunks = split(self.BODY)
+        read = []
+
+        def reader():
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+
+        first = next(iter(streaming_module.ResponseStream(
+            reader(), 'homeworks'
+        )))
+        assert first == self.BODY['homeworks'][0]
+        assert len(read) < len(chunks), (
+            'Первая работа должна отдаваться до чтения всего ответа.'
+        )
+
+    def test_records(self, streaming_module, homework_module):
+        stream = streaming_module.ResponseStream(
+            split(self.BODY, 5), 'homeworks'
+        )
+        records = list(streaming_module.check_stream(stream))
+        assert records == homework_module.check_response(self.BODY)
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{}', KeyError),
+        (b'{"homeworks": {}}', TypeError),
+        (b'{"homeworks": [{"status": "approved"}]}', ValueError),
+        (b'{"homeworks": [', json.JSONDecodeError),
+        (b'{"homeworks": []} []', json.JSONDecodeError),
+        (b'{"code": "not_authenticated"}', 'ResponseException'),
+    ])
+    def test_invalid_response(self, streaming_module, homework_module, body,
+                              error):
+        if isinstance(error, str):
+            error = getattr(homework_module, error)
+        stream = streaming_module.ResponseStream([body], 'homeworks')
+        with pytest.raises(error):
+            list(streaming_module.check_stream(stream))
+
+
+class TestStreamingEngine:
+    DATA = {
+        'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+        'current_date': 1000198000
+    }
+
+    def test_poll_sends_status(self, monkeypatch, homework_module):
+        import engine
+
+        def streamed_get(*args, stream=False, **kwargs):
+            assert stream, 'Ответ должен запрашиваться потоково.'
+            response = utils.MockResponseGET(
+                *args, random_timestamp=self.DATA['current_date'], **kwargs
+            )
+            response.iter_content = lambda chunk_size: split(self.DATA, 4)
+            response.encoding = None
+            response.close = lambda: None
+            return response
+
+        monkeypatch.setattr(requests, 'get', streamed_get)
+        bot = utils.MockTelegramBot()
+        table = make_table()
+        polling = engine.PollingEngine(bot, table, concurrency=2, stream=True)
+        state = table['student0']
+        try:
+            poll_and_send(polling, state)
+        finally:
+            polling.close()
+        assert state.timestamp == self.DATA['current_date']
+        assert state.last_error == ''
+        assert homework_module.HOMEWORK_VERDICTS['approved'] in bot.text
@@ -0,0 +1,102 @@
+import pytest
+import telegram
+
+
+@pytest.fixture
+def stub_module():
+    import stub_servers
+    return stub_servers
+
+
+@pytest.fixture
+def start_stub(stub_module):
+    servers = []
+
+    def start(handler, **kwargs):
+        server = stub_module.start_stub(
+            handler, stub_module.StubConfig(seed=1, **kwargs)
+        )
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestStubServers:
+
+    def test_practicum_stub(self, monkeypatch, stub_module, start_stub,
+                            homework_module):
+        url = start_stub(stub_module.PracticumStubHandler, homeworks=5)
+        monkeypatch.setattr(
+            homework_module, 'ENDPOINT', url + stub_module.PRACTICUM_PATH
+        )
+        response = homework_module.request_api_answer(
+            {'Authorization': 'OAuth token'}, 0
+        )
+        homeworks = homework_module.check_response(response)
+        assert len(homeworks) == 5
+        for homework in homeworks:
+            homework_module.render_status(homework)
+
+    def test_practicum_stub_stream(self, monkeypatch, stub_module,
+                                   start_stub, homework_module):
+        import streaming
+        url = start_stub(stub_module.PracticumStubHandler, homeworks=50)
+        monkeypatch.setattr(
+            homework_module, 'ENDPOINT', url + stub_module.PRACTICUM_PATH
+        )
+        stream = streaming.request_api_stream(
+            {'Authorization': 'OAuth token'}, 0, chunk_size=100
+        )
+        assert len(list(streaming.check_stream(stream))) == 50
+        assert stream.get('current_date')
+
+    @pytest.mark.parametrize('config, error, status_code', [
+        ({'error_500': 1}, 'TheAnswerIsNot200Error', 500),
+        ({'error_401': 1}, 'TheAnswerIsNot200Error', 401),
+        ({'rate_limit': 1}, 'TheAnswerIsNot200Error', 429),
+        ({'malformed': 1}, 'JSONDecodeError', None),
+    ])
+    def test_practicum_stub_errors(self, monkeypatch, stub_module,
+                                   start_stub, homework_module, config,
+                                   error, status_code):
+        url = start_stub(stub_module.PracticumStubHandler, **config)
+        monkeypatch.setattr(
+            homework_module, 'ENDPOINT', url + stub_module.PRACTICUM_PATH
+        )
+        headers = {'Authorization': 'OAuth token'}
+        if 'rate_limit' in config:
+            homework_module.request_api_answer(headers, 0)
+        with pytest.raises(Exception) as raised:
+            homework_module.request_api_answer(headers, 0)
+        assert type(raised.value).__name__ == error
+        assert getattr(raised.value, 'status_code', None) == status_code
+        if status_code == 429:
+            assert raised.value.retry_after == '1'
+
+    def test_telegram_stub(self, stub_module, start_stub):
+        import http_pool
+        import telegram_api
+        url = start_stub(stub_module.TelegramStubHandler, rate_limit=2)
+        session = http_pool.create_session()
+        client = telegram_api.TelegramClient(
+            '1234:abc', session, base_url=url + '/bot'
+        )
+        try:
+            result = client.send_message('12345', 'text')
+            client.send_message('12345', 'text')
+            with pytest.raises(telegram.error.RetryAfter):
+                client.send_message('12345', 'text')
+        finally:
+            session.close()
+        assert result['text'] == 'text'
+
+    def test_latency_spec(self, stub_module):
+        assert stub_module.parse_latency('fixed:0.5')() == 0.5
+        assert 1 <= stub_module.parse_latency('uniform:1:2')() <= 2
+        assert stub_module.parse_latency('lognormal:0.05:0.5')() > 0
+        with pytest.raises(ValueError):
+            stub_module.parse_latency('normal:1')
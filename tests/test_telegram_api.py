@@ -0,0 +1,75 @@
+import pytest
+import telegram
+
+
+class MockResponsePOST:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class MockSession:
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def post(self, url, json=None, timeout=None):
+        self.calls.append((url, json))
+        self.timeout = timeout
+        return MockResponsePOST(self.data)
+
+
+class TestTelegramClient:
+
+    def test_send_message(self):
+        import telegram_api
+        session = MockSession({'ok': True, 'result': {'message_id': 1}})
+        client = telegram_api.TelegramClient(
+            '1234:abc', session, base_url='http://localhost/bot'
+        )
+        assert client.send_message('12345', 'text') == {'message_id': 1}
+        assert session.calls == [(
+            'http://localhost/bot1234:abc/sendMessage',
+            {'chat_id': '12345', 'text': 'text'}
+        )]
+
+    @pytest.mark.parametrize('answer, error', [
+        ({'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+          'parameters': {'retry_after': 3}}, telegram.error.RetryAfter),
+        ({'ok': False, 'error_code': 401, 'description': 'Unauthorized'},
+         telegram.error.Unauthorized),
+        ({'ok': False, 'error_code': 400, 'description': 'chat not found'},
+         telegram.error.BadRequest),
+        ({'ok': False, 'error_code': 500, 'description': 'Internal'},
+         telegram.TelegramError),
+    ])
+    def test_api_errors(self, answer, error):
+        import telegram_api
+        client = telegram_api.TelegramClient('1234:abc', MockSession(answer))
+        with pytest.raises(error):
+            client.send_message('12345', 'text')
+
+    def test_send_chat_message_handles_client_errors(self, homework_module):
+        import telegram_api
+        client = telegram_api.TelegramClient('1234:abc', MockSession(
+            {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 3}}
+        ))
+        assert homework_module.send_chat_message(
+            client, '12345', 'text'
+        ) is False
+
+    def test_get_updates(self):
+        import telegram_api
+        session = MockSession({'ok': True, 'result': [{'update_id': 5}]})
+        client = telegram_api.TelegramClient(
+            '1234:abc', session, base_url='http://localhost/bot'
+        )
+        assert client.get_updates(offset=5, timeout=30) == [{'update_id': 5}]
+        url, data = session.calls[0]
+        assert url.endswith('/getUpdates')
+        assert data['offset'] == 5 and data['timeout'] == 30
+        assert session.timeout > 30, (
+            'Таймаут HTTP-запроса должен быть больше времени long polling.'
+        )
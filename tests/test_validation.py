@@ -0,0 +1,48 @@
+import pytest
+
+
+class TestResponseValidator:
+    HOMEWORK = {'id': 7, 'homework_name': 'hw7', 'status': 'approved',
+                'date_updated': '2020-02-13T14:40:57Z', 'lesson_name': 'x'}
+
+    def test_records(self, homework_module):
+        records = homework_module.check_response({
+            'homeworks': [self.HOMEWORK, {'homework_name': 'hw8',
+                                          'status': 'rejected'}]
+        })
+        assert records == [
+            homework_module.HomeworkRecord(
+                'hw7', 'approved', 7, '2020-02-13T14:40:57Z'
+            ),
+            homework_module.HomeworkRecord('hw8', 'rejected', None, None),
+        ], 'check_response должна возвращать проверенные записи работ.'
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': ['hw']}, TypeError),
+        ({'homeworks': [{'status': 'approved'}]}, ValueError),
+        ({'homeworks': [{'homework_name': 'hw'}]}, ValueError),
+        ({'homeworks': [{'homework_name': 'hw', 'status': 'new'}]},
+         ValueError),
+    ])
+    def test_invalid_response(self, homework_module, response, error):
+        with pytest.raises(error):
+            homework_module.check_response(response)
+
+    def test_error_names_missing_field(self, homework_module):
+        with pytest.raises(ValueError, match='homework_name'):
+            homework_module.check_response(
+                {'homeworks': [self.HOMEWORK, {'status': 'approved'}]}
+            )
+
+    def test_custom_schema(self, homework_module):
+        validate_response, validate_homework = (
+            homework_module.compile_validator(dict(
+                homework_module.RESPONSE_SCHEMA, choices={}
+            ))
+        )
+        record = validate_homework({'homework_name': 'hw', 'status': 'new'})
+        assert record.status == 'new'
+        assert validate_response({'homeworks': []}) == []
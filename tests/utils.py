@@ -1,4 +1,7 @@
+import asyncio
+import json
 import logging
+import time
 from collections import namedtuple
 from contextlib import contextmanager
 from http import HTTPStatus
@@ -81,8 +84,13 @@ class MockResponseGET:
         self.status_code = http_status
         self.reason = ''
         self.text = ''
+        self.headers = {}
         logging.warn(MockResponseGET.CALLED_LOG_MSG)
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
     def json(self):
         data = {
             "homeworks": [],
@@ -103,3 +111,32 @@ class MockTelegramBot:
 
 class BreakInfiniteLoop(Exception):
     pass
+
+
+def mock_get_with_data(data, delay=0):
+    def mocked_response(*args, **kwargs):
+        time.sleep(delay)
+        response = MockResponseGET(
+            *args, random_timestamp=data.get('current_date'),
+            http_status=HTTPStatus.OK, **kwargs
+        )
+        response.json = lambda: data
+        return response
+    return mocked_response
+
+
+def poll_and_send(polling, state=None):
+    async def run():
+        if state is None:
+            await polling.poll_all()
+        else:
+            await polling.poll(state)
+        await polling.outbox.drain()
+    asyncio.run(run())
+
+
+def make_table(qty=1):
+    from accounts import Account, AccountTable
+    return AccountTable(
+        Account(f'student{i}', f'token{i}', str(i)) for i in range(qty)
+    )